@@ -0,0 +1,140 @@
+"""Structured JSON access logs written off the event loop.
+
+Handlers only put records on a queue (``QueueHandler``); a ``QueueListener``
+thread formats them as JSON lines and writes them to stdout, so a slow
+terminal or log shipper never stalls request handling. Every ``app.*``
+logger goes through the same queue once ``start`` has run.
+
+Each request gets a ``RequestStats`` that the SQLAlchemy cursor events and
+the versioned cache add to, giving per-request DB time, statement count
+and cache hits. Successful requests are sampled with
+``ACCESS_LOG_SAMPLE_RATE``; requests ending in 4xx/5xx are always logged
+unless ``ACCESS_LOG_ALL_ERRORS`` is off.
+"""
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import config
+
+access_logger = logging.getLogger("app.access")
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    cache_hits: int = 0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def begin_request() -> RequestStats:
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def record_cache_hit() -> None:
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.cache_hits += 1
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    # SQLAlchemy's async greenlets carry the caller's context, so this is
+    # the request that issued the statement
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def should_log(status_code: int) -> bool:
+    if status_code >= 400 and config.ACCESS_LOG_ALL_ERRORS:
+        return True
+    return random.random() < config.ACCESS_LOG_SAMPLE_RATE
+
+
+def log_request(route: str | None, method: str, path: str, status_code: int, duration: float, stats: RequestStats) -> None:
+    if not should_log(status_code):
+        return
+    level = logging.ERROR if status_code >= 500 else logging.INFO
+    # Fields ride on the record; the JSON is built on the listener thread
+    access_logger.log(level, "request", extra={"access": {
+        "route": route,
+        "method": method,
+        "path": path,
+        "status": status_code,
+        "duration_ms": round(duration * 1000, 3),
+        "db_ms": round(stats.db_seconds * 1000, 3),
+        "queries": stats.queries,
+        "cache_hits": stats.cache_hits,
+    }})
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "access", {}))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+class LogPipeline:
+    def __init__(self):
+        self._listener: QueueListener | None = None
+
+    def start(self, handler: logging.Handler | None = None) -> None:
+        if self._listener is not None:
+            return
+        if handler is None:
+            handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter())
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        app_logger = logging.getLogger("app")
+        app_logger.addHandler(QueueHandler(records))
+        app_logger.setLevel(config.LOG_LEVEL)
+        app_logger.propagate = False
+        self._listener = QueueListener(records, handler, respect_handler_level=True)
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Flush what is queued and detach from the app loggers"""
+        if self._listener is None:
+            return
+        self._listener.stop()
+        self._listener = None
+        app_logger = logging.getLogger("app")
+        for handler in [h for h in app_logger.handlers if isinstance(h, QueueHandler)]:
+            app_logger.removeHandler(handler)
+        app_logger.propagate = True
+
+
+log_pipeline = LogPipeline()
@@ -0,0 +1,258 @@
+"""Sales analytics.
+
+Revenue reports are served from pre-aggregated hourly buckets: order writes
+add to (or, for cancellations, subtract from) one ``revenue_hourly`` row in
+the same transaction, so reports never parse ``orders.placed_at``. Daily
+figures are rolled up from the hourly rows, which keeps a year-long report
+at a few thousand rows per outlet.
+
+Top-selling items are computed in memory with NumPy over the order lines of
+the requested window. NumPy is imported on first use so it does not count
+against worker cold start.
+"""
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from sqlalchemy import func, literal_column, select, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.archive import archive_table, archived_before
+from app.database import JavaOutletBase, MenuItems, Orders, RevenueHourly
+from app.money import from_minor_units
+
+if TYPE_CHECKING:
+    import numpy as np
+
+revenue_table = RevenueHourly.__table__
+outlets_table = JavaOutletBase.__table__
+menu_items_table = MenuItems.__table__
+orders_table = Orders.__table__
+
+# Length of the bucket key prefix that identifies each granularity
+GRANULARITY_KEY_LENGTH = {"hour": 13, "day": 10}
+
+
+def hour_bucket(placed_at: str) -> str:
+    """"2024-01-01T08:15:00+00:00" -> "2024-01-01T08" (placed_at is stored in UTC)"""
+    return placed_at[:13]
+
+
+def bucket_key(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return hour_bucket(value.astimezone(timezone.utc).isoformat())
+
+
+def period_start(key: str) -> datetime:
+    """Inverse of the bucket keys: the UTC start of the hour or day"""
+    if len(key) == GRANULARITY_KEY_LENGTH["day"]:
+        key += "T00"
+    return datetime.fromisoformat(f"{key}:00:00+00:00")
+
+
+async def record_revenue(
+    session, outlet_id: int, placed_at: str, currency: str, amount_cents: int, orders: int = 1
+) -> None:
+    """Add an order to its hourly bucket; pass negative values to take it out again.
+
+    Call inside the transaction that writes the order.
+    """
+    statement = sqlite_insert(revenue_table).values(
+        outlet_id=outlet_id,
+        hour=hour_bucket(placed_at),
+        currency=currency,
+        order_count=orders,
+        revenue_cents=amount_cents,
+    )
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[revenue_table.c.outlet_id, revenue_table.c.hour, revenue_table.c.currency],
+            set_={
+                "order_count": revenue_table.c.order_count + statement.excluded.order_count,
+                "revenue_cents": revenue_table.c.revenue_cents + statement.excluded.revenue_cents,
+            },
+        )
+    )
+
+
+def revenue_query(
+    granularity: str,
+    outlet_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+):
+    """Buckets in [start, end), rolled up to the granularity"""
+    period = func.substr(revenue_table.c.hour, 1, GRANULARITY_KEY_LENGTH[granularity]).label("period")
+    conditions = []
+    if outlet_id is not None:
+        conditions.append(revenue_table.c.outlet_id == outlet_id)
+    if start is not None:
+        conditions.append(revenue_table.c.hour >= bucket_key(start))
+    if end is not None:
+        conditions.append(revenue_table.c.hour < bucket_key(end))
+    return (
+        select(
+            revenue_table.c.outlet_id,
+            period,
+            revenue_table.c.currency,
+            func.sum(revenue_table.c.order_count).label("order_count"),
+            func.sum(revenue_table.c.revenue_cents).label("revenue_cents"),
+        )
+        .where(*conditions)
+        .group_by(revenue_table.c.outlet_id, literal_column("period"), revenue_table.c.currency)
+        .order_by(revenue_table.c.outlet_id, literal_column("period"))
+    )
+
+
+def merge_revenue_rows(shard_rows: list[list]) -> list[dict]:
+    """Combine ``revenue_query`` results from several order shards, in the same order"""
+    merged: dict[tuple, dict] = {}
+    for rows in shard_rows:
+        for row in rows:
+            key = (row["outlet_id"], row["period"], row["currency"])
+            if key in merged:
+                merged[key]["order_count"] += row["order_count"]
+                merged[key]["revenue_cents"] += row["revenue_cents"]
+            else:
+                merged[key] = dict(row)
+    return [merged[key] for key in sorted(merged, key=lambda key: key[:2])]
+
+
+
+@dataclass
+class ProductTotals:
+    """Sales per product group; ``groups[i]`` describes ``units[i]`` and ``revenue_cents[i]``"""
+    groups: list[dict]
+    units: "np.ndarray"
+    revenue_cents: "np.ndarray"
+
+
+async def load_product_totals(session, since: str, chunk_size: int) -> ProductTotals:
+    """Units and revenue per (county, product) for orders placed since ``since``"""
+    return await product_totals(session, await count_units_sold(session, since, chunk_size))
+
+
+async def count_units_sold(session, since: str, chunk_size: int) -> "np.ndarray":
+    """Units sold per menu item id (the array index) in orders placed since ``since``.
+
+    Orders are streamed in chunks. Each chunk's ``product_ids`` arrays are
+    parsed with a single ``json.loads`` and counted with ``np.bincount``,
+    so Python never loops per order line. With order shards, run this on
+    each shard and add the arrays with ``add_units``.
+    """
+    import numpy as np
+
+    units = np.zeros(0, dtype=np.int64)
+    result = await session.stream(await _product_ids_since(session, since))
+    async for chunk in result.scalars().partitions(chunk_size):
+        line_items = np.array(json.loads("[" + ",".join(ids[1:-1] for ids in chunk if ids != "[]") + "]"), dtype=np.int64)
+        units = add_units(units, np.bincount(line_items[line_items >= 0]))
+    return units
+
+
+def add_units(a: "np.ndarray", b: "np.ndarray") -> "np.ndarray":
+    import numpy as np
+
+    if len(a) < len(b):
+        a, b = b, a
+    total = a.copy()
+    total[: len(b)] += b
+    return total.astype(np.int64)
+
+
+async def product_totals(session, units_sold: "np.ndarray") -> ProductTotals:
+    """Group units sold by (county, product) using the current menu.
+
+    Products are grouped across a county's outlets by SKU, or by name when
+    there is no SKU. Revenue is units times the current menu price.
+    """
+    import numpy as np
+
+    items = (
+        await session.execute(
+            select(
+                menu_items_table.c.id,
+                menu_items_table.c.menu_item_name,
+                menu_items_table.c.sku,
+                menu_items_table.c.price_cents,
+                menu_items_table.c.currency,
+                outlets_table.c.county,
+            ).join(outlets_table, outlets_table.c.id == menu_items_table.c.outlet_id)
+        )
+    ).all()
+    size = max((item.id for item in items), default=0) + 1
+    # Ids of deleted menu items fall off the end
+    units = np.zeros(size, dtype=np.int64)
+    units[: min(size, len(units_sold))] = units_sold[:size]
+
+    group_index: dict[tuple, int] = {}
+    groups = []
+    group_of_item = np.full(size, -1, dtype=np.int64)
+    price_cents = np.zeros(size, dtype=np.int64)
+    for item in items:
+        key = (item.county, item.sku or item.menu_item_name, item.currency)
+        if key not in group_index:
+            group_index[key] = len(groups)
+            groups.append(
+                {"county": item.county, "product": item.menu_item_name, "sku": item.sku, "currency": item.currency}
+            )
+        group_of_item[item.id] = group_index[key]
+        price_cents[item.id] = item.price_cents
+
+    # bincount weights are float64, which is exact for integer sums below 2**53
+    known = group_of_item >= 0
+    return ProductTotals(
+        groups=groups,
+        units=np.bincount(group_of_item[known], weights=units[known], minlength=len(groups)).astype(np.int64),
+        revenue_cents=np.bincount(
+            group_of_item[known], weights=(units * price_cents)[known], minlength=len(groups)
+        ).astype(np.int64),
+    )
+
+
+async def _product_ids_since(session, since: str):
+    """product_ids of non-cancelled orders placed since ``since``, including archived ones if needed"""
+    statement = select(orders_table.c.product_ids).where(
+        orders_table.c.placed_at >= since, orders_table.c.status != "cancelled"
+    )
+    watermark = await archived_before(session)
+    if watermark is not None and since < watermark:
+        statement = union_all(
+            statement,
+            select(archive_table.c.product_ids).where(
+                archive_table.c.placed_at >= since, archive_table.c.status != "cancelled"
+            ),
+        )
+    return statement
+
+
+def rank_top_items(totals: ProductTotals, limit: int, sort: str, county: str | None = None) -> list[dict]:
+    """The ``limit`` best sellers per county, by units or revenue"""
+    import numpy as np
+
+    counties = np.array([group["county"] for group in totals.groups], dtype=object)
+    primary, secondary = (totals.units, totals.revenue_cents)
+    if sort == "revenue":
+        primary, secondary = secondary, primary
+    # lexsort uses the last key first; negated for descending order
+    ranking = np.lexsort((-secondary, -primary))
+    ranking = ranking[totals.units[ranking] > 0]
+    report = []
+    for name in sorted(set(counties[ranking])):
+        if county is not None and name != county:
+            continue
+        top = ranking[counties[ranking] == name][:limit]
+        report.append({
+            "county": name,
+            "items": [
+                {
+                    **totals.groups[index],
+                    "units": int(totals.units[index]),
+                    "revenue": from_minor_units(int(totals.revenue_cents[index])),
+                }
+                for index in top
+            ],
+        })
+    return report
@@ -1,27 +1,119 @@
-from fastapi import FastAPI
-from app.database import init_db, run_db_operation
+import time
+
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Header, Query, Request, WebSocket, WebSocketDisconnect
+from app.access_log import begin_request, log_pipeline, log_request
+from app.analytics import (
+    add_units,
+    count_units_sold,
+    merge_revenue_rows,
+    period_start,
+    product_totals,
+    rank_top_items,
+    record_revenue,
+    revenue_query,
+)
+from app.archive import archive_table, archived_before
+from app.coalesce import single_flight, statement_key
+from app.cache import MENU_ITEMS_SCOPE, ORDERS_SCOPE, OUTLETS_SCOPE, cache
+from app.compression import EncodedBody, accepts_gzip
+from app.events import order_events
+from app.deadlines import (
+    DEADLINE_HEADER,
+    DeadlineExceeded,
+    deadline_seconds,
+    request_deadline,
+    sub_deadline,
+    without_deadline,
+)
+from app.limits import admission_response, route_key
+from app.maintenance import maintenance
+from app.metrics import metrics
+from app.profiling import is_admin, profiler, wants_profile
+from app.money import from_minor_units, to_minor_units
+from app.database import (
+    OPEN_ORDER_PREDICATE,
+    CatalogTombstone,
+    JavaOutletBase,
+    MenuItems,
+    Orders,
+    bump_cache_versions,
+    database_path,
+    fan_out,
+    init_db,
+    init_shards,
+    next_order_id,
+    run_db_operation,
+    shard_for_order,
+    shard_for_outlet,
+    shard_paths,
+)
+import asyncio
+import functools
 import json
+from collections import Counter
 from fastapi import status
 from contextlib import asynccontextmanager
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
-from sqlalchemy import text
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from app import config
+from sqlalchemy import case, func, insert, select, text, union_all, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.snapshot import catalog_snapshots
+from app.startup import Stopwatch, report as startup_report
 from app.schema import (
     JavaOutlet,
     JavaOutletCreate,
+    JavaOutletBatch,
     JavaOutletList,
     JavaOutletMenuItem,
+    JavaOutletMenuItemBulkUpdate,
     JavaOutletMenuItemCreate,
     JavaOutletOrder,
     JavaOutletOrderCreate,
+    JavaOutletOrderHistory,
+    JavaOutletPartial,
+    JavaOutletPartialList,
+    JavaOutletOrderStatusUpdate,
     JavaOutletOrderSummary,
+    JavaOutletQueue,
     JavaOutletWithMenu,
+    DashboardSection,
+    MenuItemBulkUpdateResult,
+    MenuItemRestock,
+    OutletChanges,
+    OutletDashboard,
+    OutletSyncResult,
+    RevenueGranularity,
+    RevenueReport,
+    TopItemsReport,
+    TopItemsSort,
+    partial_outlet_model,
 )
 
+outlets_table = JavaOutletBase.__table__
+tombstones_table = CatalogTombstone.__table__
+menu_items_table = MenuItems.__table__
+orders_table = Orders.__table__
+OUTLET_FIELDS = tuple(JavaOutlet.model_fields)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> None:
-    await init_db()
+    log_pipeline.start()
+    with Stopwatch() as db_init:
+        startup_report.schema_applied = await init_db()
+        await init_shards()
+    startup_report.db_init_seconds = db_init.seconds
+    cache.start(database_path(), shard_paths())
+    maintenance.start()
+    catalog_snapshots.start()
     yield
+    await catalog_snapshots.stop()
+    await maintenance.stop()
+    cache.stop()
+    log_pipeline.stop()
     
     
 
@@ -33,6 +125,67 @@ app = FastAPI(lifespan=lifespan,
     version="0.2.0",
 )    
 
+
+@app.middleware("http")
+async def record_first_request(request: Request, call_next):
+    """Time the first request this worker serves for the startup report"""
+    if startup_report.first_request_seconds is not None:
+        return await call_next(request)
+    with Stopwatch() as first_request:
+        response = await call_next(request)
+    startup_report.first_request_seconds = first_request.seconds
+    return response
+
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Rate limit per client and shed load when the database is saturated"""
+    rejection = admission_response(request)
+    if rejection is not None:
+        return rejection
+    return await call_next(request)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    return JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
+
+
+@app.middleware("http")
+async def apply_deadline(request: Request, call_next):
+    """Give the request a deadline that run_db_operation enforces"""
+    seconds = deadline_seconds(route_key(request), request.headers.get(DEADLINE_HEADER))
+    with request_deadline(seconds):
+        return await call_next(request)
+
+
+if config.PROFILING_ENABLED:
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        """cProfile the requests that ask for it (or are sampled)"""
+        if not wants_profile(request):
+            return await call_next(request)
+        return await profiler(request, call_next)
+
+
+if config.ACCESS_LOG_ENABLED:
+    @app.middleware("http")
+    async def access_log(request: Request, call_next):
+        """Queue one structured log line per request; outermost, so it sees rejections too"""
+        stats = begin_request()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            log_request(
+                route_key(request), request.method, request.url.path,
+                status_code, time.perf_counter() - started, stats,
+            )
+
+
 @app.get("/", response_model=dict)
 def service_overview() -> dict:
     return {
@@ -40,20 +193,161 @@ def service_overview() -> dict:
         "version": "0.2.0",
         "status": "ok",
     }
+
+
+@app.get("/metrics", response_model=dict)
+def service_metrics() -> dict:
+    """Process-local counters for the worker that serves this request"""
+    return {
+        **metrics.snapshot(),
+        "cache_hits": cache.hits,
+        "cache_misses": cache.misses,
+    }
+
+
+@app.get("/health/startup", response_model=dict)
+def startup_timings() -> dict:
+    """Cold start timings of the worker that serves this request"""
+    return startup_report.as_dict()
+
+
+@app.get("/health/maintenance", response_model=dict)
+def maintenance_status() -> dict:
+    """Last run, status and duration of this worker's SQLite maintenance jobs"""
+    return maintenance.status()
+
+
+@app.get("/admin/profiles", response_model=dict)
+def recent_profiles(request: Request, limit: int = Query(10, ge=1, le=100)) -> dict:
+    """Hotspots of the latest requests this worker profiled; admin keys only"""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="An admin API key is required")
+    return {"profiles": list(profiler.recent)[:limit]}
     
-@app.get("/outlets/", response_model=JavaOutletList)
-async def list_java_outlets() -> JavaOutletList:
-    """Lists all Javahouse Coffee Kenya Outlets"""
+FIELDS_QUERY = Query(
+    None,
+    description="Comma-separated outlet fields to return, e.g. `id,name,is_open`",
+)
+
+
+def _parse_outlet_fields(fields: str | None) -> tuple[str, ...] | None:
+    """Validate a ?fields= value; None means every column"""
+    if fields is None:
+        return None
+    selected = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in selected if name not in OUTLET_FIELDS]
+    if not selected or unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown outlet fields: {', '.join(unknown) or fields!r}. Allowed: {', '.join(OUTLET_FIELDS)}",
+        )
+    return selected
+
+
+IDS_QUERY = Query(
+    None,
+    description="Comma-separated outlet ids to look up in one query, e.g. `3,1,7`",
+)
+
+
+def _parse_outlet_ids(ids: str) -> list[int]:
     try:
-        rows = await run_db_operation(
-        lambda connection: connection.execute(text("SELECT * FROM java_outlets ORDER BY name")).mappings().all()
-    ) 
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"ids must be comma-separated integers, got {ids!r}")
+    if not parsed or len(parsed) > config.OUTLET_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=422, detail=f"Pass between 1 and {config.OUTLET_BATCH_MAX_IDS} outlet ids"
+        )
+    return parsed
+
+
+def _outlet_columns(selected: tuple[str, ...] | None):
+    return [outlets_table.c[name] for name in selected or OUTLET_FIELDS]
+
+
+def _project_outlet(outlet: dict, selected: tuple[str, ...]) -> dict:
+    return partial_outlet_model(selected).model_validate(outlet).model_dump(mode="json")
+
     
-        outlets = [dict(row) for row in rows]
-        return JavaOutletList(outlets=outlets)    
+@app.get("/outlets/", response_model=JavaOutletList | JavaOutletPartialList | JavaOutletBatch)
+async def list_java_outlets(
+    request: Request, fields: str | None = FIELDS_QUERY, ids: str | None = IDS_QUERY
+) -> JavaOutletList:
+    """Lists all Javahouse Coffee Kenya Outlets, or with ?ids= just those outlets"""
+    selected = _parse_outlet_fields(fields)
+    if ids is not None:
+        return await _batch_outlets(_parse_outlet_ids(ids), selected)
+    try:
+        statement = select(*_outlet_columns(selected)).order_by(outlets_table.c.name)
+
+        async def _list_outlets(session):
+            result = await session.execute(statement)
+            return [dict(row) for row in result.mappings().all()]
+
+        async def _build_body():
+            outlets = await run_db_operation(_list_outlets)
+            if selected is None:
+                content = JavaOutletList(outlets=outlets).model_dump_json().encode()
+            else:
+                projected = [_project_outlet(outlet, selected) for outlet in outlets]
+                content = json.dumps({"outlets": projected}, separators=(",", ":")).encode()
+            return EncodedBody(content)
+
+        # The serialized (and, on demand, gzipped) body is cached per data
+        # version; concurrent misses share one query and serialization
+        version, body = cache.lookup(OUTLETS_SCOPE, ("list", selected))
+        if body is None:
+            body = await single_flight.run(statement_key(statement), _build_body)
+            cache.put(OUTLETS_SCOPE, ("list", selected), body, version)
+        return body.response(request)
+    except (HTTPException, DeadlineExceeded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+async def _batch_outlets(outlet_ids: list[int], selected: tuple[str, ...] | None) -> JSONResponse:
+    """Multi-get: cached outlets are reused, the rest come from one IN query.
+
+    Shares cache entries with GET /outlets/{outlet_id}/. Results follow the
+    request order, duplicates included; unknown ids are null and listed in
+    ``missing``.
+    """
+    try:
+        found, versions = {}, {}
+        for outlet_id in dict.fromkeys(outlet_ids):
+            versions[outlet_id], found[outlet_id] = cache.lookup(OUTLETS_SCOPE, (outlet_id, selected))
+        pending = [outlet_id for outlet_id, outlet in found.items() if outlet is None]
+
+        if pending:
+            columns = _outlet_columns(selected)
+            if "id" not in (selected or OUTLET_FIELDS):
+                columns.append(outlets_table.c.id)
+            statement = select(*columns).where(outlets_table.c.id.in_(pending))
+
+            async def _fetch_outlets(session):
+                result = await session.execute(statement)
+                return [dict(row) for row in result.mappings().all()]
+
+            for outlet in await run_db_operation(_fetch_outlets):
+                outlet_id = outlet["id"] if selected is None or "id" in selected else outlet.pop("id")
+                found[outlet_id] = outlet
+                cache.put(OUTLETS_SCOPE, (outlet_id, selected), outlet, versions[outlet_id])
+
+        outlets = []
+        for outlet_id in outlet_ids:
+            outlet = found[outlet_id]
+            if outlet is not None:
+                outlet = _project_outlet(outlet, selected) if selected else JavaOutlet(**outlet).model_dump(mode="json")
+            outlets.append(outlet)
+        missing = [outlet_id for outlet_id in dict.fromkeys(outlet_ids) if found[outlet_id] is None]
+        return JSONResponse({"outlets": outlets, "missing": missing})
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post(
     "/outlets/",
     response_model=JavaOutlet,
@@ -84,37 +378,23 @@ async def create_java_outlet(payload: JavaOutletCreate) -> JavaOutlet:
     Returns: The created outlet with all fields including the database-generated ID and timestamp.
     """
     try:
-        # Insert the outlet with datetime as native type
         async def _insert_outlet(session):
-            await session.execute(
-                """
-                INSERT INTO java_outlets (
-                    name, location, city, county, street_address, phone_number,
-                    rating, is_open, opening_time, closing_time, last_inspected_at
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    payload.name,
-                    payload.location,
-                    payload.city,
-                    payload.county,
-                    payload.street_address,
-                    payload.phone_number,
-                    payload.rating,
-                    payload.is_open,
-                    payload.opening_time,
-                    payload.closing_time,
-                    datetime.now(timezone.utc),
+            result = await session.execute(
+                insert(outlets_table).values(
+                    **payload.model_dump(),
+                    last_inspected_at=datetime.now(timezone.utc).isoformat(),
                 )
             )
+            await bump_cache_versions(session, OUTLETS_SCOPE)
+            return result.inserted_primary_key[0]
         
-        await run_db_operation(_insert_outlet)
+        outlet_id = await run_db_operation(_insert_outlet, commit=True)
+        catalog_snapshots.schedule()
         
         # Fetch the inserted outlet with actual DB values
         async def _fetch_outlet(session):
-            return await session.execute(
-                text("SELECT * FROM java_outlets ORDER BY id DESC LIMIT 1")
+            result = await session.execute(
+                select(*_outlet_columns(None)).where(outlets_table.c.id == outlet_id)
             )
             return result.mappings().first()
         
@@ -127,36 +407,923 @@ async def create_java_outlet(payload: JavaOutletCreate) -> JavaOutlet:
         outlet_data = dict(created_outlet)
         
         return JavaOutlet(**outlet_data)
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating a new outlet: {str(e)}")
     
     
+@app.get(
+    "/outlets/changes",
+    response_model=OutletChanges,
+    summary="Outlets and menu items changed since a sync point",
+)
+async def get_outlet_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(None, ge=1, le=10000),
+) -> OutletChanges:
+    """
+    Delta sync: every outlet and menu item insert, update and delete takes
+    the next value of one change sequence (maintained by triggers). Returns
+    the rows changed after `since` plus tombstones for deleted rows; store
+    `next_since` and pass it next time. While `has_more` is true, call
+    again straight away. `since=0` is a full sync.
+    """
+    page_size = limit or config.CHANGES_PAGE_SIZE
+    sources = {
+        "outlets": select(*_outlet_columns(None), outlets_table.c.change_seq),
+        "menu_items": select(menu_items_table),
+        "deleted": select(
+            tombstones_table.c.entity,
+            tombstones_table.c.entity_id.label("id"),
+            tombstones_table.c.change_seq,
+            tombstones_table.c.deleted_at,
+        ),
+    }
+    try:
+        async def _fetch_changes(session):
+            changes = {}
+            for name, statement in sources.items():
+                change_seq = statement.selected_columns.change_seq
+                result = await session.execute(
+                    statement.where(change_seq > since).order_by(change_seq).limit(page_size)
+                )
+                changes[name] = [dict(row) for row in result.mappings().all()]
+            return changes
+
+        changes = await run_db_operation(_fetch_changes)
+        # A full page may have more behind it: stop every kind at the lowest
+        # sequence any full page reached, so nothing in between is skipped
+        full_pages = [rows[-1]["change_seq"] for rows in changes.values() if len(rows) == page_size]
+        cut = min(full_pages) if full_pages else None
+        if cut is not None:
+            changes = {name: [row for row in rows if row["change_seq"] <= cut] for name, rows in changes.items()}
+        sequences = [row["change_seq"] for rows in changes.values() for row in rows]
+        return OutletChanges(
+            outlets=changes["outlets"],
+            menu_items=[_menu_item_from_row(row) for row in changes["menu_items"]],
+            deleted=changes["deleted"],
+            next_since=max(sequences, default=since),
+            has_more=cut is not None,
+        )
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+SYNCED_OUTLET_FIELDS = tuple(JavaOutletCreate.model_fields)
+
+
+@app.put(
+    "/outlets/sync",
+    response_model=OutletSyncResult,
+    summary="Reconcile outlets with the HQ master list",
+)
+async def sync_outlets(payload: list[JavaOutletCreate], close_missing: bool = False) -> OutletSyncResult:
+    """
+    Takes HQ's complete outlet list and upserts it on the natural key
+    (name, city) with batched `INSERT ... ON CONFLICT DO UPDATE`. Rows whose
+    content already matches are not written at all. With
+    `close_missing=true`, open outlets absent from the list are marked
+    closed. Everything happens in one transaction.
+    """
+    incoming = {(outlet.name, outlet.city): outlet.model_dump() for outlet in payload}
+    if len(incoming) != len(payload):
+        raise HTTPException(status_code=422, detail="Each (name, city) may appear only once")
+    try:
+        async def _sync(session):
+            result = await session.execute(select(outlets_table.c.id, *_outlet_columns(SYNCED_OUTLET_FIELDS)))
+            existing = {(row["name"], row["city"]): dict(row) for row in result.mappings().all()}
+
+            inserts, updates, unchanged = [], [], 0
+            for key, outlet in incoming.items():
+                current = existing.get(key)
+                if current is None:
+                    inserts.append({**outlet, "last_inspected_at": datetime.now(timezone.utc).isoformat()})
+                elif any(current[name] != outlet[name] for name in SYNCED_OUTLET_FIELDS):
+                    updates.append(outlet)
+                else:
+                    unchanged += 1
+
+            for rows in (inserts, updates):
+                for start in range(0, len(rows), config.OUTLET_SYNC_BATCH_SIZE):
+                    statement = sqlite_insert(outlets_table).values(rows[start:start + config.OUTLET_SYNC_BATCH_SIZE])
+                    await session.execute(
+                        statement.on_conflict_do_update(
+                            index_elements=[outlets_table.c.name, outlets_table.c.city],
+                            set_={name: statement.excluded[name] for name in SYNCED_OUTLET_FIELDS},
+                        )
+                    )
+
+            closed = []
+            if close_missing:
+                closed = [row["id"] for key, row in existing.items() if key not in incoming and row["is_open"]]
+                if closed:
+                    await session.execute(
+                        update(outlets_table).where(outlets_table.c.id.in_(closed)).values(is_open=0)
+                    )
+
+            if inserts or updates or closed:
+                await bump_cache_versions(session, OUTLETS_SCOPE)
+            return OutletSyncResult(
+                inserted=len(inserts), updated=len(updates), unchanged=unchanged, closed=len(closed)
+            )
+
+        result = await run_db_operation(_sync, commit=True)
+        catalog_snapshots.schedule()
+        return result
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error syncing outlets: {str(e)}")
+
+
 @app.get(
     "/outlets/{outlet_id}/",
-    response_model=JavaOutlet,
+    response_model=JavaOutlet | JavaOutletPartial,
     summary="Get specific details of a JavaHouse Outlet",
     description="Retrieves detailed information about a specific JavaHouse Coffee Kenya outlet by its ID."
 )
-async def get_outlet(outlet_id: int) -> JavaOutlet:
+async def get_outlet(outlet_id: int, fields: str | None = FIELDS_QUERY) -> JavaOutlet:
     """Retrieves details of a specific JavaHouse Coffee Kenya Outlet by its ID."""
+    selected = _parse_outlet_fields(fields)
     try:
+        statement = select(*_outlet_columns(selected)).where(outlets_table.c.id == outlet_id)
+
         async def _fetch_outlet(session):
-            result = await session.execute(
-                text("SELECT * FROM java_outlets WHERE id = :id"),
-                {"id": outlet_id}
-            )
+            result = await session.execute(statement)
             return result.mappings().first()
         
-        outlet_data = await run_db_operation(_fetch_outlet)
+        version, outlet_data = cache.lookup(OUTLETS_SCOPE, (outlet_id, selected))
+        if outlet_data is None:
+            outlet_data = await single_flight.run(
+                statement_key(statement), lambda: run_db_operation(_fetch_outlet)
+            )
+            if outlet_data is not None:
+                outlet_data = dict(outlet_data)
+            cache.put(OUTLETS_SCOPE, (outlet_id, selected), outlet_data, version)
         
         if outlet_data is None:
             raise HTTPException(status_code=404, detail="Outlet not found")        
         
         outlet_dict = dict(outlet_data)
+        if selected is not None:
+            return JSONResponse(_project_outlet(outlet_dict, selected))
         return JavaOutlet(**outlet_dict)
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+def _menu_item_from_row(row) -> JavaOutletMenuItem:
+    menu_item = dict(row)
+    menu_item["price"] = from_minor_units(menu_item.pop("price_cents"))
+    return JavaOutletMenuItem(**menu_item)
+
+
+@app.post(
+    "/menu-items/",
+    response_model=JavaOutletMenuItem,
+    status_code=status.HTTP_201_CREATED,
+    summary="Add a menu item to an outlet",
+)
+async def create_menu_item(payload: JavaOutletMenuItemCreate) -> JavaOutletMenuItem:
+    """Adds a menu item to an existing JavaHouse Coffee Kenya outlet."""
+    try:
+        async def _insert_menu_item(session):
+            outlet = await session.execute(
+                select(outlets_table.c.id).where(outlets_table.c.id == payload.outlet_id)
+            )
+            if outlet.first() is None:
+                raise HTTPException(status_code=404, detail="Outlet not found")
+            values = payload.model_dump(exclude={"price"})
+            values["price_cents"] = to_minor_units(payload.price)
+            if payload.stock == 0:
+                values["is_available"] = False
+            result = await session.execute(insert(menu_items_table).values(**values))
+            await bump_cache_versions(session, MENU_ITEMS_SCOPE)
+            return {**values, "id": result.inserted_primary_key[0]}
+
+        menu_item = await run_db_operation(_insert_menu_item, commit=True)
+        catalog_snapshots.schedule()
+        return _menu_item_from_row(menu_item)
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating menu item: {str(e)}")
+
+
+@app.patch(
+    "/menu-items/bulk",
+    response_model=MenuItemBulkUpdateResult,
+    summary="Change price or availability of many menu items at once",
+)
+async def bulk_update_menu_items(payload: JavaOutletMenuItemBulkUpdate) -> MenuItemBulkUpdateResult:
+    """
+    Applies one change to every menu item matching the filter (`sku`,
+    `category` and/or `outlet_ids`) as a single UPDATE in one transaction,
+    e.g. a chain-wide price rise or marking an item sold out everywhere.
+    `price_change_percent` is relative (`-10` is 10% off) and rounds to the
+    nearest cent. Returns how many items changed.
+    """
+    item_filter = payload.filter
+    if item_filter.sku is None and item_filter.category is None and not item_filter.outlet_ids:
+        raise HTTPException(status_code=422, detail="Filter on at least one of sku, category or outlet_ids")
+    if payload.set_price is not None and payload.price_change_percent is not None:
+        raise HTTPException(status_code=422, detail="Use either set_price or price_change_percent, not both")
+
+    values = {}
+    if payload.set_price is not None:
+        values["price_cents"] = to_minor_units(payload.set_price)
+    if payload.price_change_percent is not None:
+        # Integer arithmetic in basis points keeps the rounding exact (half up)
+        basis_points = 10000 + int(payload.price_change_percent * 100)
+        values["price_cents"] = (menu_items_table.c.price_cents * basis_points + 5000) // 10000
+    if payload.is_available is not None:
+        values["is_available"] = int(payload.is_available)
+    if not values:
+        raise HTTPException(
+            status_code=422, detail="Give set_price, price_change_percent and/or is_available"
+        )
+
+    conditions = []
+    if item_filter.sku is not None:
+        conditions.append(menu_items_table.c.sku == item_filter.sku)
+    if item_filter.category is not None:
+        conditions.append(menu_items_table.c.category == item_filter.category)
+    if item_filter.outlet_ids:
+        conditions.append(menu_items_table.c.outlet_id.in_(item_filter.outlet_ids))
+    try:
+        async def _bulk_update(session):
+            result = await session.execute(update(menu_items_table).where(*conditions).values(**values))
+            if result.rowcount:
+                await bump_cache_versions(session, MENU_ITEMS_SCOPE)
+            return result.rowcount
+
+        updated = await run_db_operation(_bulk_update, commit=True)
+        catalog_snapshots.schedule()
+        return MenuItemBulkUpdateResult(updated=updated)
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating menu items: {str(e)}")
+
+
+@app.post(
+    "/menu-items/{item_id}/restock",
+    response_model=JavaOutletMenuItem,
+    summary="Add units to a menu item's stock",
+)
+async def restock_menu_item(item_id: int, payload: MenuItemRestock) -> JavaOutletMenuItem:
+    """
+    Adds `quantity` units and makes the item available again. An item whose
+    stock was not counted starts being counted from `quantity`.
+    """
+    try:
+        async def _restock(session):
+            result = await session.execute(
+                update(menu_items_table)
+                .where(menu_items_table.c.id == item_id)
+                .values(stock=func.coalesce(menu_items_table.c.stock, 0) + payload.quantity, is_available=1)
+                .returning(menu_items_table)
+            )
+            menu_item = result.mappings().first()
+            if menu_item is not None:
+                await bump_cache_versions(session, MENU_ITEMS_SCOPE)
+            return menu_item
+
+        menu_item = await run_db_operation(_restock, commit=True)
+        if menu_item is None:
+            raise HTTPException(status_code=404, detail="Menu item not found")
+        catalog_snapshots.schedule()
+        return _menu_item_from_row(menu_item)
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error restocking menu item: {str(e)}")
+
+
+@app.get(
+    "/outlets/{outlet_id}/menu/",
+    response_model=JavaOutletWithMenu,
+    summary="Get an outlet together with its menu",
+)
+async def get_outlet_menu(outlet_id: int, request: Request) -> JavaOutletWithMenu:
+    """Retrieves an outlet and all of its menu items, ordered by category and name."""
+    try:
+        async def _fetch_menu(session):
+            outlet = await session.execute(
+                select(*_outlet_columns(None)).where(outlets_table.c.id == outlet_id)
+            )
+            outlet = outlet.mappings().first()
+            if outlet is None:
+                return None
+            menu_items = await session.execute(
+                select(menu_items_table)
+                .where(menu_items_table.c.outlet_id == outlet_id)
+                .order_by(menu_items_table.c.category, menu_items_table.c.menu_item_name)
+            )
+            return {
+                "outlet": dict(outlet),
+                "menu_items": [_menu_item_from_row(row) for row in menu_items.mappings().all()],
+            }
+
+        scopes = (OUTLETS_SCOPE, MENU_ITEMS_SCOPE)
+        version, body = cache.lookup(scopes, ("menu", outlet_id))
+        if body is None:
+            menu = await run_db_operation(_fetch_menu)
+            if menu is None:
+                raise HTTPException(status_code=404, detail="Outlet not found")
+            body = EncodedBody(JavaOutletWithMenu(**menu).model_dump_json().encode())
+            cache.put(scopes, ("menu", outlet_id), body, version)
+        return body.response(request)
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    candidates = request.headers.get("if-none-match", "")
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in candidates.split(","))
+
+
+@app.get(
+    "/catalog/snapshot",
+    response_class=FileResponse,
+    summary="Download the full outlet and menu catalog",
+    description=(
+        "Every outlet with its menu as one pre-built JSON file, gzipped when the client accepts it. "
+        "The ETag changes with the catalog version; send If-None-Match to revalidate and Range to resume."
+    ),
+)
+async def catalog_snapshot(request: Request) -> Response:
+    try:
+        files = await catalog_snapshots.current()
+        headers = {"Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if accepts_gzip(request):
+            path, etag = files.gzip_path, files.gzip_etag
+            headers["Content-Encoding"] = "gzip"
+        else:
+            path, etag = files.json_path, files.etag
+        headers["ETag"] = etag
+        if _etag_matches(request, etag):
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+        return FileResponse(path, media_type="application/json", headers=headers)
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Allowed status changes; completed and cancelled are terminal
+ORDER_STATUS_TRANSITIONS = {
+    "pending": {"preparing", "cancelled"},
+    "preparing": {"ready", "cancelled"},
+    "ready": {"completed", "cancelled"},
+    "completed": set(),
+    "cancelled": set(),
+}
+OPEN_ORDERS = text(OPEN_ORDER_PREDICATE)
+
+
+def _counted_units(items: dict, product_ids: list[int]) -> dict[int, int]:
+    """Units ordered per menu item, for the items whose stock is counted"""
+    return {
+        product_id: count
+        for product_id, count in Counter(product_ids).items()
+        if items[product_id].stock is not None
+    }
+
+
+async def _take_stock(session, outlet_id: int, units: dict[int, int]) -> None:
+    """Take ordered units off stock in one conditional UPDATE.
+
+    ``stock >= n`` is checked by SQLite under the write lock, so concurrent
+    orders can never take the same unit twice; no Python lock is involved.
+    Items that reach zero become unavailable in the same statement.
+    """
+    if not units:
+        return
+    quantity = case(units, value=menu_items_table.c.id)
+    result = await session.execute(
+        update(menu_items_table)
+        .where(menu_items_table.c.id.in_(units), menu_items_table.c.stock >= quantity)
+        .values(
+            stock=menu_items_table.c.stock - quantity,
+            is_available=case(
+                (menu_items_table.c.stock - quantity <= 0, 0), else_=menu_items_table.c.is_available
+            ),
+        )
+        .returning(menu_items_table.c.id)
+    )
+    short = sorted(units.keys() - set(result.scalars()))
+    if short:
+        # Leaving without commit rolls back the items that were taken
+        raise HTTPException(status_code=409, detail=f"Not enough stock at outlet {outlet_id}: {short}")
+    await bump_cache_versions(session, MENU_ITEMS_SCOPE)
+
+
+async def _return_stock(session, units: dict[int, int]) -> None:
+    quantity = case(units, value=menu_items_table.c.id)
+    await session.execute(
+        update(menu_items_table)
+        .where(menu_items_table.c.id.in_(units), menu_items_table.c.stock.is_not(None))
+        .values(
+            is_available=case((menu_items_table.c.stock == 0, 1), else_=menu_items_table.c.is_available),
+            stock=menu_items_table.c.stock + quantity,
+        )
+    )
+    await bump_cache_versions(session, MENU_ITEMS_SCOPE)
+
+
+def _order_from_row(row) -> JavaOutletOrder:
+    order = dict(row)
+    order["product_ids"] = json.loads(order["product_ids"])
+    order["total_price"] = from_minor_units(order.pop("total_price_cents"))
+    return JavaOutletOrder(**order)
+
+
+@app.post(
+    "/orders/",
+    response_model=JavaOutletOrder,
+    status_code=status.HTTP_201_CREATED,
+    summary="Place an order at an outlet",
+)
+async def create_order(payload: JavaOutletOrderCreate) -> JavaOutletOrder:
+    """
+    Places a new order. Every product id must be an available menu item of
+    the outlet; repeat an id to order it more than once. The total is
+    computed from current menu prices and the order starts as `pending`.
+    Items with counted stock lose the ordered units in the same transaction;
+    when one has too few left the order is rejected with 409.
+    """
+    if not payload.product_ids:
+        raise HTTPException(status_code=422, detail="An order needs at least one product")
+    try:
+        async def _available_items(session):
+            result = await session.execute(
+                select(
+                    menu_items_table.c.id,
+                    menu_items_table.c.price_cents,
+                    menu_items_table.c.currency,
+                    menu_items_table.c.stock,
+                )
+                .where(
+                    menu_items_table.c.outlet_id == payload.outlet_id,
+                    menu_items_table.c.id.in_(set(payload.product_ids)),
+                    menu_items_table.c.is_available == 1,
+                )
+            )
+            items = {row.id: row for row in result}
+            missing = sorted(set(payload.product_ids) - items.keys())
+            if missing:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Products not available at outlet {payload.outlet_id}: {missing}",
+                )
+            return items
+
+        async def _insert_order(session, items):
+            values = {
+                **payload.model_dump(),
+                "product_ids": json.dumps(payload.product_ids),
+                "total_price_cents": sum(items[product_id].price_cents for product_id in payload.product_ids),
+                "currency": items[payload.product_ids[0]].currency,
+                "is_completed": 0,
+                "status": "pending",
+                "placed_at": datetime.now(timezone.utc).isoformat(),
+            }
+            order_id = next_order_id(shard)
+            if order_id is not None:
+                values["id"] = order_id
+            result = await session.execute(insert(orders_table).values(**values).returning(orders_table))
+            await record_revenue(
+                session, payload.outlet_id, values["placed_at"], values["currency"], values["total_price_cents"]
+            )
+            await bump_cache_versions(session, ORDERS_SCOPE)
+            return result.mappings().one()
+
+        shard = await shard_for_outlet(payload.outlet_id)
+        if shard == 0:
+            # The menu lives in the same file: check, take stock and insert in one transaction
+            async def _place_order(session):
+                items = await _available_items(session)
+                await _take_stock(session, payload.outlet_id, _counted_units(items, payload.product_ids))
+                return await _insert_order(session, items)
+
+            row = await run_db_operation(_place_order, commit=True)
+        else:
+            # Stock is committed on the main file first and handed back if
+            # the order cannot be written to its shard
+            items = await run_db_operation(_available_items)
+            units = _counted_units(items, payload.product_ids)
+
+            async def _take(session):
+                await _take_stock(session, payload.outlet_id, units)
+
+            await run_db_operation(_take, commit=True)
+            try:
+                row = await run_db_operation(lambda session: _insert_order(session, items), commit=True, shard=shard)
+            except BaseException:
+                if units:
+                    with without_deadline():
+                        await run_db_operation(lambda session: _return_stock(session, units), commit=True)
+                raise
+
+        order = _order_from_row(row)
+        order_events.publish(order.outlet_id, "order.created", order.model_dump(mode="json"))
+        return order
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error placing order: {str(e)}")
+
+
+@app.patch(
+    "/orders/{order_id}/status",
+    response_model=JavaOutletOrder,
+    summary="Move an order to its next status",
+    responses={409: {"description": "The order is no longer in expected_status"}},
+)
+async def update_order_status(order_id: int, payload: JavaOutletOrderStatusUpdate) -> JavaOutletOrder:
+    """
+    Changes an order's status with compare-and-set semantics: the update
+    only applies while the order is still in `expected_status`, so two
+    tablets acting on the same order cannot both win. No lock is held
+    between reading and writing; the loser gets 409 with the current status.
+    """
+    if payload.status not in ORDER_STATUS_TRANSITIONS[payload.expected_status]:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Cannot move an order from {payload.expected_status} to {payload.status}",
+        )
+    try:
+        async def _compare_and_set(session):
+            is_completed = payload.status == "completed"
+            result = await session.execute(
+                update(orders_table)
+                .where(orders_table.c.id == order_id, orders_table.c.status == payload.expected_status)
+                .values(
+                    status=payload.status,
+                    is_completed=int(is_completed),
+                    completed_at=datetime.now(timezone.utc).isoformat() if is_completed else None,
+                )
+                .returning(orders_table)
+            )
+            order = result.mappings().first()
+            if order is not None:
+                if payload.status == "cancelled":
+                    await record_revenue(
+                        session, order["outlet_id"], order["placed_at"], order["currency"],
+                        -order["total_price_cents"], orders=-1,
+                    )
+                await bump_cache_versions(session, ORDERS_SCOPE)
+                return True, order
+            current = await session.execute(select(orders_table).where(orders_table.c.id == order_id))
+            return False, current.mappings().first()
+
+        updated, order = await run_db_operation(_compare_and_set, commit=True, shard=shard_for_order(order_id))
+        if order is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        if not updated:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Order {order_id} is {order['status']}, not {payload.expected_status}",
+            )
+        order = _order_from_row(order)
+        order_events.publish(order.outlet_id, "order.status", order.model_dump(mode="json"))
+        return order
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating order status: {str(e)}")
+
+
+@app.get(
+    "/outlets/{outlet_id}/queue",
+    response_model=JavaOutletQueue,
+    summary="Open orders for an outlet's kitchen, oldest first",
+)
+async def get_outlet_queue(outlet_id: int, limit: int = Query(100, ge=1, le=500)) -> JavaOutletQueue:
+    """
+    Lists orders that are not completed or cancelled yet. The query is
+    served by the partial index on open orders, so its cost depends on the
+    queue length rather than on the size of the order history.
+    """
+    try:
+        statement = (
+            select(orders_table)
+            .where(orders_table.c.outlet_id == outlet_id, OPEN_ORDERS)
+            .order_by(orders_table.c.placed_at)
+            .limit(limit)
+        )
+
+        async def _fetch_queue(session):
+            result = await session.execute(statement)
+            return result.mappings().all()
+
+        rows = await run_db_operation(_fetch_queue, shard=await shard_for_outlet(outlet_id))
+        return JavaOutletQueue(outlet_id=outlet_id, orders=[_order_from_row(row) for row in rows])
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@app.get(
+    "/outlets/{outlet_id}/orders",
+    response_model=JavaOutletOrderHistory,
+    summary="Orders placed at an outlet in a time range, newest first",
+)
+async def get_outlet_orders(
+    outlet_id: int,
+    placed_from: datetime | None = Query(None, alias="from"),
+    placed_to: datetime | None = Query(None, alias="to"),
+    limit: int = Query(100, ge=1, le=500),
+) -> JavaOutletOrderHistory:
+    """
+    Order history for an outlet. Old finished orders live in cold storage;
+    it is only queried when `from` reaches back past the archive watermark,
+    so recent-history reads stay on the small hot table.
+    """
+    def _in_range(table):
+        conditions = [table.c.outlet_id == outlet_id]
+        if placed_from is not None:
+            conditions.append(table.c.placed_at >= _timestamp(placed_from))
+        if placed_to is not None:
+            conditions.append(table.c.placed_at < _timestamp(placed_to))
+        return select(*table.c).where(*conditions)
+
+    try:
+        async def _fetch_orders(session):
+            statement = _in_range(orders_table)
+            watermark = await archived_before(session)
+            if watermark is not None and (placed_from is None or _timestamp(placed_from) < watermark):
+                statement = union_all(statement, _in_range(archive_table))
+            statement = statement.order_by(text("placed_at DESC")).limit(limit)
+            result = await session.execute(statement)
+            return result.mappings().all()
+
+        rows = await run_db_operation(_fetch_orders, shard=await shard_for_outlet(outlet_id))
+        return JavaOutletOrderHistory(outlet_id=outlet_id, orders=[_order_from_row(row) for row in rows])
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _timestamp(value: datetime) -> str:
+    """placed_at is stored as a UTC isoformat string; naive values are taken as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+@app.get(
+    "/outlets/{outlet_id}/dashboard",
+    response_model=OutletDashboard,
+    summary="Outlet, menu, today's order totals and queue in one call",
+)
+async def get_outlet_dashboard(outlet_id: int, response: Response) -> OutletDashboard:
+    """
+    Reads the four sections of the manager dashboard concurrently, each on
+    its own pooled session. A section that fails or runs past
+    `DASHBOARD_SECTION_TIMEOUT_SECONDS` comes back as null with its status
+    in `sections`; the others are unaffected. Order totals cover today
+    (UTC) in the outlet's main currency. `latency_ms` is the slowest
+    section; the Server-Timing header has each one.
+    """
+    shard = await shard_for_outlet(outlet_id)
+
+    async def _outlet(session):
+        result = await session.execute(select(*_outlet_columns(None)).where(outlets_table.c.id == outlet_id))
+        outlet = result.mappings().first()
+        return None if outlet is None else dict(outlet)
+
+    async def _menu(session):
+        result = await session.execute(
+            select(menu_items_table)
+            .where(menu_items_table.c.outlet_id == outlet_id)
+            .order_by(menu_items_table.c.category, menu_items_table.c.menu_item_name)
+        )
+        return [_menu_item_from_row(row) for row in result.mappings().all()]
+
+    async def _queue(session):
+        result = await session.execute(
+            select(orders_table)
+            .where(orders_table.c.outlet_id == outlet_id, OPEN_ORDERS)
+            .order_by(orders_table.c.placed_at)
+            .limit(100)
+        )
+        return [_order_from_row(row) for row in result.mappings().all()]
+
+    async def _outlet_name(session):
+        result = await session.execute(select(outlets_table.c.name).where(outlets_table.c.id == outlet_id))
+        return result.scalar()
+
+    async def _totals_today(session):
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        result = await session.execute(revenue_query("day", outlet_id, today))
+        return result.mappings().all()
+
+    async def _order_summary():
+        # Totals can live on an order shard, the name is on the main file
+        name, rows = await asyncio.gather(
+            run_db_operation(_outlet_name), run_db_operation(_totals_today, shard=shard)
+        )
+        if name is None:
+            return None
+        main = max(rows, key=lambda row: row["revenue_cents"], default=None)
+        return JavaOutletOrderSummary(
+            outlet_id=outlet_id,
+            outlet_name=name,
+            total_orders=main["order_count"] if main else 0,
+            total_revenue=from_minor_units(main["revenue_cents"] if main else 0),
+            **({"currency": main["currency"]} if main else {}),
+        )
+
+    async def _section(read):
+        started = time.perf_counter()
+        value, status, detail = None, "ok", None
+        try:
+            with sub_deadline(config.DASHBOARD_SECTION_TIMEOUT_SECONDS):
+                value = await read()
+        except DeadlineExceeded:
+            status = "timeout"
+        except Exception as e:
+            status, detail = "error", str(e)
+        return value, DashboardSection(
+            status=status, latency_ms=(time.perf_counter() - started) * 1000, detail=detail
+        )
+
+    reads = {
+        "outlet": lambda: run_db_operation(_outlet),
+        "menu_items": lambda: run_db_operation(_menu),
+        "order_summary": _order_summary,
+        "queue": lambda: run_db_operation(_queue, shard=shard),
+    }
+    results = dict(zip(reads, await asyncio.gather(*(_section(read) for read in reads.values()))))
+    values = {name: value for name, (value, _) in results.items()}
+    sections = {name: section for name, (_, section) in results.items()}
+    if sections["outlet"].status == "ok" and values["outlet"] is None:
+        raise HTTPException(status_code=404, detail="Outlet not found")
+
+    latency_ms = max(section.latency_ms for section in sections.values())
+    response.headers["Server-Timing"] = ", ".join(
+        [f"{name};dur={section.latency_ms:.1f}" for name, section in sections.items()]
+        + [f"total;dur={latency_ms:.1f}"]
+    )
+    return OutletDashboard(outlet_id=outlet_id, **values, sections=sections, latency_ms=latency_ms)
+
+
+@app.get(
+    "/analytics/revenue",
+    response_model=RevenueReport,
+    summary="Revenue per outlet per hour or day",
+)
+async def get_revenue(
+    outlet_id: int | None = None,
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    granularity: RevenueGranularity = "hour",
+) -> RevenueReport:
+    """
+    Revenue and order counts from the hourly buckets maintained on order
+    writes; daily figures are rolled up from them. Cancelled orders are not
+    counted. `from`/`to` are truncated to the hour, `to` is exclusive, and
+    omitting `outlet_id` reports every outlet.
+    """
+    try:
+        statement = revenue_query(granularity, outlet_id, start, end)
+
+        async def _fetch_revenue(session):
+            result = await session.execute(statement)
+            return result.mappings().all()
+
+        key = ("revenue", granularity, outlet_id, start, end)
+        version, report = cache.lookup(ORDERS_SCOPE, key)
+        if report is None:
+            if outlet_id is not None:
+                rows = await run_db_operation(_fetch_revenue, shard=await shard_for_outlet(outlet_id))
+            else:
+                rows = merge_revenue_rows(await fan_out(_fetch_revenue))
+            report = RevenueReport(
+                granularity=granularity,
+                buckets=[
+                    {
+                        **row,
+                        "period_start": period_start(row["period"]),
+                        "revenue": from_minor_units(row["revenue_cents"]),
+                    }
+                    for row in rows
+                ],
+            )
+            cache.put(ORDERS_SCOPE, key, report, version)
+        return report
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get(
+    "/analytics/top-items",
+    response_model=TopItemsReport,
+    summary="Best-selling menu items per county",
+)
+async def get_top_items(
+    days: int = Query(30, ge=1, le=366),
+    county: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    sort: TopItemsSort = "units",
+) -> TopItemsReport:
+    """
+    Top products by units sold or revenue over the last `days`, per county.
+    Cancelled orders are excluded and revenue uses current menu prices. The
+    aggregated totals are cached per data version (and per hour of the
+    window), so changing `county`, `limit` or `sort` does not re-read orders.
+    """
+    try:
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+        async def _count_units(session):
+            return await count_units_sold(session, since, config.ANALYTICS_CHUNK_SIZE)
+
+        scopes = (ORDERS_SCOPE, MENU_ITEMS_SCOPE, OUTLETS_SCOPE)
+        key = ("top-items", days, since[:13])
+        version, totals = cache.lookup(scopes, key)
+        if totals is None:
+            # Order lines are counted on every shard at once, then grouped
+            # with the menu from the main file
+            units = functools.reduce(add_units, await fan_out(_count_units))
+
+            async def _group_totals(session):
+                return await product_totals(session, units)
+
+            totals = await run_db_operation(_group_totals)
+            cache.put(scopes, key, totals, version)
+        return TopItemsReport(days=days, sort=sort, counties=rank_top_items(totals, limit, sort, county))
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get(
+    "/outlets/{outlet_id}/orders/stream",
+    summary="Live order events for an outlet (Server-Sent Events)",
+    response_class=StreamingResponse,
+)
+async def stream_outlet_orders(
+    outlet_id: int,
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    Pushes `order.created` and `order.status` events as they happen instead
+    of having tablets poll. Reconnecting clients send `Last-Event-ID` (browsers
+    do this automatically) to replay what they missed; an id this worker did
+    not issue yields a `feed.reset` event, after which the client should
+    reload the queue. A comment line is sent as a heartbeat when the feed is
+    idle.
+    """
+    subscription = order_events.subscribe(outlet_id, last_event_id)
+
+    async def _events():
+        try:
+            while not subscription.finished:
+                event = await subscription.next_event(config.EVENT_HEARTBEAT_SECONDS)
+                yield event.as_sse() if event is not None else ": heartbeat\n\n"
+        finally:
+            order_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/outlets/{outlet_id}/orders/ws")
+async def outlet_orders_websocket(websocket: WebSocket, outlet_id: int, last_event_id: str | None = None) -> None:
+    """WebSocket flavour of the live order feed; resume with ?last_event_id="""
+    await websocket.accept()
+    subscription = order_events.subscribe(outlet_id, last_event_id)
+    try:
+        while not subscription.finished:
+            event = await subscription.next_event(config.EVENT_HEARTBEAT_SECONDS)
+            await websocket.send_json(event.as_dict() if event is not None else {"type": "heartbeat"})
+        # Dropped as a slow consumer: ask the client to reconnect and resume
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        order_events.unsubscribe(subscription)
+
+
+startup_report.import_seconds = time.perf_counter() - _import_started
@@ -0,0 +1,105 @@
+"""Cold storage for finished orders.
+
+Completed and cancelled orders older than ``ORDER_ARCHIVE_AFTER_DAYS`` are
+moved from ``orders`` into ``orders_archive`` in bounded batches, so the hot
+table and its indexes stay the size of recent activity. Each batch is one
+short write transaction and foreground requests get the database between
+batches.
+
+A watermark in ``schema_meta`` records the newest cutoff ever used. Every
+archived order was placed before it, so reads whose range starts at or after
+the watermark never touch the archive. With order shards each file is
+archived in turn and keeps its own watermark.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import config
+from app.cache import ORDERS_SCOPE
+from app.database import (
+    Orders,
+    OrdersArchive,
+    SchemaMeta,
+    bump_cache_versions,
+    in_flight_operations,
+    run_db_operation,
+    shard_count,
+)
+
+ARCHIVE_WATERMARK_KEY = "orders_archived_before"
+ARCHIVABLE_STATUSES = ("completed", "cancelled")
+
+orders_table = Orders.__table__
+archive_table = OrdersArchive.__table__
+
+
+def archive_cutoff(older_than_days: int, now: datetime | None = None) -> str:
+    """placed_at value before which finished orders are archived"""
+    return ((now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)).isoformat()
+
+
+async def archived_before(session) -> str | None:
+    """The archive watermark; orders placed from then on are all in ``orders``"""
+    result = await session.execute(
+        select(SchemaMeta.value).where(SchemaMeta.key == ARCHIVE_WATERMARK_KEY)
+    )
+    return result.scalar()
+
+
+async def archive_orders(
+    older_than_days: int = config.ORDER_ARCHIVE_AFTER_DAYS,
+    batch_size: int = config.ORDER_ARCHIVE_BATCH_SIZE,
+) -> int:
+    """Move finished orders placed before the cutoff; returns how many moved"""
+    cutoff = archive_cutoff(older_than_days)
+    moved = 0
+    for shard in range(shard_count()):
+        moved += await _archive_shard(shard, cutoff, batch_size)
+    return moved
+
+
+async def _archive_shard(shard: int, cutoff: str, batch_size: int) -> int:
+    # Raised before anything moves so readers consult the archive as soon
+    # as the first batch lands there
+    async def _raise_watermark(session):
+        await session.execute(
+            sqlite_insert(SchemaMeta)
+            .values(key=ARCHIVE_WATERMARK_KEY, value=cutoff)
+            .on_conflict_do_update(
+                index_elements=[SchemaMeta.key],
+                set_={"value": func.max(SchemaMeta.value, cutoff)},
+            )
+        )
+
+    await run_db_operation(_raise_watermark, commit=True, shard=shard)
+
+    batch = (
+        select(*orders_table.c)
+        .where(orders_table.c.status.in_(ARCHIVABLE_STATUSES), orders_table.c.placed_at < cutoff)
+        .order_by(orders_table.c.id)
+        .limit(batch_size)
+    )
+
+    async def _move_batch(session):
+        # INSERT ... SELECT takes the write lock up front, so workers running
+        # the job at the same time serialize instead of copying the same rows
+        result = await session.execute(
+            insert(archive_table).from_select(list(orders_table.c.keys()), batch).returning(archive_table.c.id)
+        )
+        ids = result.scalars().all()
+        if ids:
+            await session.execute(delete(orders_table).where(orders_table.c.id.in_(ids)))
+            await bump_cache_versions(session, ORDERS_SCOPE)
+        return len(ids)
+
+    moved = 0
+    while True:
+        count = await run_db_operation(_move_batch, commit=True, shard=shard)
+        moved += count
+        if count < batch_size:
+            return moved
+        while in_flight_operations() > 0:
+            await asyncio.sleep(0.05)
@@ -0,0 +1,121 @@
+"""Process-local read cache kept coherent across uvicorn workers.
+
+Every worker holds its own cache, so writes made by one worker have to reach
+the others. Writers bump a row in the ``cache_versions`` table inside their
+transaction (see ``bump_cache_versions``). Each worker keeps a dedicated
+SQLite connection that checks ``PRAGMA data_version``. The value only changes
+after another connection commits, so in steady state a lookup costs one
+in-memory pragma. The versions table is read again only after a commit.
+
+With order shards every file is watched; a scope's version is the sum of
+its counters across files, so a bump in any of them changes it.
+"""
+import sqlite3
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app import config
+from app.access_log import record_cache_hit
+
+OUTLETS_SCOPE = "outlets"
+MENU_ITEMS_SCOPE = "menu_items"
+ORDERS_SCOPE = "orders"
+
+
+class VersionWatcher:
+    """Tracks the ``cache_versions`` tables through one dedicated connection per file"""
+
+    def __init__(self, paths: list[str]):
+        self._connections = [
+            sqlite3.connect(path, check_same_thread=False, isolation_level=None) for path in paths
+        ]
+        self._data_versions: list | None = None
+        self._versions: dict[str, int] = {}
+
+    def versions(self) -> dict[str, int]:
+        data_versions = [
+            connection.execute("PRAGMA data_version").fetchone()[0] for connection in self._connections
+        ]
+        if data_versions != self._data_versions:
+            versions: dict[str, int] = {}
+            for connection in self._connections:
+                try:
+                    rows = connection.execute("SELECT scope, version FROM cache_versions").fetchall()
+                except sqlite3.OperationalError:
+                    rows = []
+                for scope, version in rows:
+                    versions[scope] = versions.get(scope, 0) + version
+            self._versions = versions
+            self._data_versions = data_versions
+        return self._versions
+
+    def close(self) -> None:
+        for connection in self._connections:
+            connection.close()
+
+
+class VersionedCache:
+    """LRU cache whose entries are tagged with the scope version they were read at"""
+
+    def __init__(self, max_entries: int = config.CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._watcher: VersionWatcher | None = None
+        self._entries: OrderedDict[tuple[Any, Hashable], tuple[Any, Any]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._watcher is not None
+
+    def start(self, path: str | None, shard_paths: list[str] = ()) -> None:
+        """Begin caching; without a database file there is nothing to watch"""
+        if path is None or not config.CACHE_ENABLED:
+            return
+        self._watcher = VersionWatcher([path, *shard_paths])
+
+    def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+        self.clear()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def lookup(self, scope: str | tuple[str, ...], key: Hashable) -> tuple[Any, Any]:
+        """Return ``(version, value)``; value is None on a miss.
+
+        Pass the version to ``put`` after loading. If a write commits while
+        the value is loading, the entry keeps the older version and is
+        dropped at the next lookup. A tuple of scopes is for values built
+        from several tables and is invalidated when any of them changes.
+        """
+        if self._watcher is None:
+            return None, None
+        versions = self._watcher.versions()
+        if isinstance(scope, str):
+            version = versions.get(scope, 0)
+        else:
+            version = tuple(versions.get(name, 0) for name in scope)
+        entry = self._entries.get((scope, key))
+        if entry is not None:
+            if entry[0] == version:
+                self._entries.move_to_end((scope, key))
+                self.hits += 1
+                record_cache_hit()
+                return version, entry[1]
+            del self._entries[(scope, key)]
+        self.misses += 1
+        return version, None
+
+    def put(self, scope: str | tuple[str, ...], key: Hashable, value: Any, version: Any) -> None:
+        if version is None or value is None:
+            return
+        self._entries[(scope, key)] = (version, value)
+        self._entries.move_to_end((scope, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+cache = VersionedCache()
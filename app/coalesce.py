@@ -0,0 +1,43 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+When many requests miss the cache for the same thing at once (an outlet in
+a push notification), the first one runs the query and the rest await its
+result instead of each taking a pooled connection for the same statement.
+
+The shared call runs in the first caller's context, so its deadline applies
+to everyone waiting on it. It is shielded: if the first caller goes away,
+the others still get the result. Followers may get a result whose query
+started just before they arrived, which is no staler than a cache hit.
+"""
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from app.metrics import metrics
+
+
+def statement_key(statement) -> tuple:
+    """Identify a query by its SQL text and bound parameters"""
+    compiled = statement.compile()
+    return str(compiled), tuple(sorted(compiled.params.items()))
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            metrics.increment("reads_coalesced")
+        return await asyncio.shield(future)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+single_flight = SingleFlight()
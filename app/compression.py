@@ -0,0 +1,53 @@
+"""Serialized response bodies that are compressed at most once per data version.
+
+Handlers keep an ``EncodedBody`` in the versioned cache next to the data it
+was built from. The gzip variant is produced the first time a client asks
+for it and reused until a write bumps the scope version.
+"""
+import gzip
+
+from fastapi import Request, Response
+
+from app import config
+
+
+def accepts_gzip(request: Request) -> bool:
+    """True when Accept-Encoding allows gzip; an explicit gzip entry overrides *"""
+    qualities = {}
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                pass
+        qualities[name.strip().lower()] = quality
+    quality = qualities.get("gzip", qualities.get("*", 0.0))
+    return quality > 0
+
+
+class EncodedBody:
+    """A JSON body plus its lazily computed gzip encoding"""
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self._gzip: bytes | None = None
+
+    @property
+    def compressible(self) -> bool:
+        return len(self.content) >= config.GZIP_MIN_SIZE
+
+    @property
+    def gzip(self) -> bytes:
+        if self._gzip is None:
+            self._gzip = gzip.compress(self.content, compresslevel=config.GZIP_LEVEL, mtime=0)
+        return self._gzip
+
+    def response(self, request: Request, status_code: int = 200) -> Response:
+        """Negotiate the encoding for this request"""
+        headers = {"Vary": "Accept-Encoding"}
+        if self.compressible and accepts_gzip(request):
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip, status_code=status_code, headers=headers, media_type="application/json")
+        return Response(self.content, status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,156 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_costs(name: str, parse=int) -> dict:
+    """Parse "GET /outlets/=5,POST /orders/=2" into {"GET /outlets/": 5, ...}"""
+    costs = {}
+    for item in os.getenv(name, "").split(","):
+        route, _, cost = item.rpartition("=")
+        if route.strip():
+            costs[route.strip()] = parse(cost)
+    return costs
+
+
+APP_ENV = os.getenv("APP_ENV", "development")
+
+DATABASE_URL = os.getenv("JAVAOUTLETS_DB_URL", "sqlite+aiosqlite:///./javaoutlets.db")
+SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+# Log every SQL statement through SQLAlchemy; for local debugging only
+DB_ECHO = _env_bool("DB_ECHO", False)
+# Order data sharded by an outlet column (app/database.py), e.g.
+# ORDER_SHARDS="Nairobi=/data/orders-nairobi.db,Mombasa=/data/orders-mombasa.db".
+# Outlets whose key is not listed keep their orders in the main file. Only
+# append entries: an order id encodes the position of its shard.
+ORDER_SHARD_KEY = os.getenv("ORDER_SHARD_KEY", "county")
+ORDER_SHARDS = dict(
+    (key.strip(), path.strip())
+    for key, _, path in (item.partition("=") for item in os.getenv("ORDER_SHARDS", "").split(","))
+    if key.strip() and path.strip()
+)
+
+# Launcher settings used by main.py
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = _env_int("PORT", 8000)
+WEB_CONCURRENCY = _env_int("WEB_CONCURRENCY", os.cpu_count() or 1)
+RELOAD = _env_bool("RELOAD", APP_ENV == "development")
+# Worker processes serving requests; the reloader only runs one
+WORKER_COUNT = 1 if RELOAD else max(1, WEB_CONCURRENCY)
+
+# In-process read cache
+CACHE_ENABLED = _env_bool("CACHE_ENABLED", True)
+CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 1024)
+
+# Most ids accepted by GET /outlets/?ids=
+OUTLET_BATCH_MAX_IDS = _env_int("OUTLET_BATCH_MAX_IDS", 100)
+
+# Most rows of each kind returned by one GET /outlets/changes page
+CHANGES_PAGE_SIZE = _env_int("CHANGES_PAGE_SIZE", 1000)
+
+# Rows per INSERT ... ON CONFLICT statement in PUT /outlets/sync
+OUTLET_SYNC_BATCH_SIZE = _env_int("OUTLET_SYNC_BATCH_SIZE", 500)
+
+# Response compression for cacheable list endpoints
+GZIP_MIN_SIZE = _env_int("GZIP_MIN_SIZE", 1024)
+GZIP_LEVEL = _env_int("GZIP_LEVEL", 6)
+
+# Live order feed (SSE / WebSocket)
+# The hub is per worker: with WEB_CONCURRENCY > 1 a subscriber only sees
+# writes handled by its own worker, and resume ids from another worker
+# trigger a feed.reset. Run the feed on a single worker (or behind sticky
+# routing) where tablets must see every order.
+EVENT_QUEUE_SIZE = _env_int("EVENT_QUEUE_SIZE", 100)
+EVENT_HISTORY_SIZE = _env_int("EVENT_HISTORY_SIZE", 1000)
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+# Order lines parsed per NumPy batch by /analytics/top-items
+ANALYTICS_CHUNK_SIZE = _env_int("ANALYTICS_CHUNK_SIZE", 5000)
+
+# Admission control: per-client token buckets and DB load shedding
+# Buckets live in each worker, so a client whose requests land on several
+# workers can reach up to WORKER_COUNT times these rates. They are not
+# divided because keep-alive connections usually pin a client to one worker.
+RATE_LIMIT_ENABLED = _env_bool("RATE_LIMIT_ENABLED", True)
+RATE_LIMIT_BURST = _env_int("RATE_LIMIT_BURST", 120)
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "20"))
+RATE_LIMIT_MAX_CLIENTS = _env_int("RATE_LIMIT_MAX_CLIENTS", 10000)
+# Keys are "METHOD /route/template"; unlisted routes cost 1 token
+RATE_LIMIT_ROUTE_COSTS = {"GET /outlets/": 5, "GET /outlets/{outlet_id}/menu/": 2, **_env_costs("RATE_LIMIT_ROUTE_COSTS")}
+# Only these X-API-Key values get a bucket of their own; requests with any
+# other key are limited by client address, so rotating keys gains nothing
+API_KEYS = frozenset(key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip())
+# In-flight budget for the whole deployment. The SQLite file is shared, so
+# each worker sheds load once it holds its share.
+DB_MAX_IN_FLIGHT = _env_int("DB_MAX_IN_FLIGHT", 64)
+DB_WORKER_MAX_IN_FLIGHT = max(1, DB_MAX_IN_FLIGHT // WORKER_COUNT)
+LOAD_SHED_RETRY_AFTER_SECONDS = _env_int("LOAD_SHED_RETRY_AFTER_SECONDS", 1)
+
+# Background SQLite maintenance (app/maintenance.py)
+MAINTENANCE_ENABLED = _env_bool("MAINTENANCE_ENABLED", True)
+MAINTENANCE_TICK_SECONDS = float(os.getenv("MAINTENANCE_TICK_SECONDS", "5"))
+# How long a due job waits for in-flight DB operations to drain before it is deferred
+MAINTENANCE_IDLE_WAIT_SECONDS = float(os.getenv("MAINTENANCE_IDLE_WAIT_SECONDS", "2"))
+WAL_CHECKPOINT_INTERVAL_SECONDS = float(os.getenv("WAL_CHECKPOINT_INTERVAL_SECONDS", "300"))
+OPTIMIZE_INTERVAL_SECONDS = float(os.getenv("OPTIMIZE_INTERVAL_SECONDS", "3600"))
+ANALYSIS_LIMIT = _env_int("ANALYSIS_LIMIT", 1000)
+INCREMENTAL_VACUUM_INTERVAL_SECONDS = float(os.getenv("INCREMENTAL_VACUUM_INTERVAL_SECONDS", "3600"))
+INCREMENTAL_VACUUM_PAGES = _env_int("INCREMENTAL_VACUUM_PAGES", 1000)
+# Completed/cancelled orders older than this move to orders_archive
+ORDER_ARCHIVE_AFTER_DAYS = _env_int("ORDER_ARCHIVE_AFTER_DAYS", 90)
+ORDER_ARCHIVE_BATCH_SIZE = _env_int("ORDER_ARCHIVE_BATCH_SIZE", 500)
+ORDER_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ORDER_ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+# Request deadlines propagated into run_db_operation
+# X-Request-Deadline-Ms can shorten these but never extend them
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "10"))
+# Keys are "METHOD /route/template"; values in seconds, e.g.
+# ROUTE_DEADLINES="GET /outlets/=3,GET /outlets/{outlet_id}/queue=1.5"
+ROUTE_DEADLINES = {
+    "GET /outlets/": 5.0,
+    "GET /outlets/{outlet_id}/": 2.0,
+    "GET /outlets/{outlet_id}/queue": 2.0,
+    **_env_costs("ROUTE_DEADLINES", float),
+}
+
+# Opt-in request profiling (app/profiling.py). Off unless admin keys or a
+# sample rate are configured; when off no middleware is installed at all.
+ADMIN_API_KEYS = frozenset(key.strip() for key in os.getenv("ADMIN_API_KEYS", "").split(",") if key.strip())
+# Fraction of requests profiled without asking, e.g. 0.001
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILING_ENABLED = bool(ADMIN_API_KEYS) or PROFILE_SAMPLE_RATE > 0
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Oldest .prof dumps are deleted beyond this many
+PROFILE_MAX_DUMPS = _env_int("PROFILE_MAX_DUMPS", 50)
+PROFILE_HOTSPOTS = _env_int("PROFILE_HOTSPOTS", 15)
+
+# Structured access logs (app/access_log.py)
+ACCESS_LOG_ENABLED = _env_bool("ACCESS_LOG_ENABLED", True)
+# Fraction of successful (< 400) requests logged
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1"))
+# Log every request that ends >= 400 regardless of the sample rate
+ACCESS_LOG_ALL_ERRORS = _env_bool("ACCESS_LOG_ALL_ERRORS", True)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Pre-built catalog snapshot files (app/snapshot.py)
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", "snapshots")
+# Quiet period after the last catalog write before the snapshot is rebuilt
+CATALOG_SNAPSHOT_DEBOUNCE_SECONDS = float(os.getenv("CATALOG_SNAPSHOT_DEBOUNCE_SECONDS", "2"))
+# Older versions are kept briefly so downloads already in progress finish
+CATALOG_SNAPSHOT_KEEP = _env_int("CATALOG_SNAPSHOT_KEEP", 3)
+
+# Each section of GET /outlets/{outlet_id}/dashboard gets at most this long;
+# a slow section comes back empty instead of holding up the others
+DASHBOARD_SECTION_TIMEOUT_SECONDS = float(os.getenv("DASHBOARD_SECTION_TIMEOUT_SECONDS", "1.5"))
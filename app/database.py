@@ -1,12 +1,22 @@
-from collections.abc import AsyncGenerator
+import asyncio
+import hashlib
+import logging
+from collections.abc import AsyncGenerator, Callable
 from  sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, relationship
 from sqlalchemy.sql import func
-from sqlalchemy import Column, Integer, Text, Float, ForeignKey
+from sqlalchemy import Column, Integer, Text, Float, ForeignKey, Index, event, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import config, deadlines
+from app.cache import OUTLETS_SCOPE, cache
 
 
-DB_url = "sqlite+aiosqlite:///./javaoutlets.db"
+logger = logging.getLogger(__name__)
+
+DB_url = config.DATABASE_URL
 
 class Base(DeclarativeBase):
     """base class for all orm models"""
@@ -28,10 +38,24 @@ class JavaOutletBase(Base):
     opening_time = Column(Text)
     closing_time = Column(Text)
     last_inspected_at = Column(Text)
+    # Maintained by triggers; see create_change_tracking_triggers
+    updated_at = Column(Text)
+    change_seq = Column(Integer)
+
+    __table_args__ = (
+        # Natural key HQ uses for the nightly outlet sync
+        Index("ux_java_outlets_name_city", "name", "city", unique=True),
+        Index("ix_java_outlets_change_seq", "change_seq"),
+    )
     
     menu_items = relationship("MenuItems", back_populates="outlet", cascade="all, delete-orphan")
     orders = relationship("Orders", back_populates="outlet", cascade="all, delete-orphan")
     
+# Orders still waiting on the kitchen; shared verbatim by ix_orders_queue and
+# the queue query so SQLite can prove the partial index covers the query
+OPEN_ORDER_PREDICATE = "status NOT IN ('completed', 'cancelled')"
+
+
 class MenuItems(Base):
     """Model for menu items at Java outlets"""
     __tablename__ = "menu_items"
@@ -41,17 +65,30 @@ class MenuItems(Base):
     menu_item_name = Column(Text, nullable=False)
     category = Column(Text)
     sku = Column(Text)
-    price = Column(Float, nullable=False)
+    # Integer minor units (cents); see app/money.py
+    price_cents = Column(Integer, nullable=False)
     currency = Column(Text, nullable=False)
     is_available = Column(Integer, nullable=False)
     has_dairy = Column(Integer, nullable=False)
     is_seasonal = Column(Integer, nullable=False)
+    # Units on hand; NULL when the item is not counted. Placing an order takes
+    # units off and marks the item unavailable when it reaches zero.
+    stock = Column(Integer)
+    # Maintained by triggers; see create_change_tracking_triggers
+    updated_at = Column(Text)
+    change_seq = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_menu_items_change_seq", "change_seq"),
+        # Serves the menu read: filter by outlet, already in display order
+        Index("ix_menu_items_outlet_menu", "outlet_id", "category", "menu_item_name"),
+    )
     
     # Relationship back to JavaOutlet
     outlet = relationship("JavaOutletBase", back_populates="menu_items")
     
     def __repr__(self):
-        return f"<MenuItems(id={self.id}, menu_item_name='{self.menu_item_name}', price={self.price})>"
+        return f"<MenuItems(id={self.id}, menu_item_name='{self.menu_item_name}', price_cents={self.price_cents})>"
     
     
 class Orders(Base):
@@ -61,7 +98,7 @@ class Orders(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     outlet_id = Column(Integer, ForeignKey("java_outlets.id"), nullable=False)
     product_ids = Column(Text, nullable=False)
-    total_price = Column(Float, nullable=False)
+    total_price_cents = Column(Integer, nullable=False)
     currency = Column(Text, nullable=False)
     is_completed = Column(Integer, nullable=False)
     status = Column(Text, nullable=False)
@@ -70,15 +107,324 @@ class Orders(Base):
     payment_method = Column(Text)
     notes = Column(Text)
     
+    # Kitchen queue: only open orders are indexed, so the index stays the size
+    # of the queue rather than of the order history. Queries must repeat the
+    # literal predicate (not a bound parameter) for SQLite to pick it.
+    __table_args__ = (
+        Index(
+            "ix_orders_queue",
+            "outlet_id",
+            "placed_at",
+            sqlite_where=text(OPEN_ORDER_PREDICATE),
+        ),
+        Index("ix_orders_outlet_placed", "outlet_id", "placed_at"),
+    )
+    
     # Relationship back to JavaOutlet
     outlet = relationship("JavaOutletBase", back_populates="orders")
     
     def __repr__(self):
         return f"<Orders(id={self.id}, outlet_id={self.outlet_id}, status='{self.status}')>"
+
+
+class OrdersArchive(Base):
+    """Finished orders moved out of ``orders`` by app/archive.py; same columns"""
+    __tablename__ = "orders_archive"
+
+    id = Column(Integer, primary_key=True)
+    outlet_id = Column(Integer, nullable=False)
+    product_ids = Column(Text, nullable=False)
+    total_price_cents = Column(Integer, nullable=False)
+    currency = Column(Text, nullable=False)
+    is_completed = Column(Integer, nullable=False)
+    status = Column(Text, nullable=False)
+    placed_at = Column(Text, nullable=False)
+    completed_at = Column(Text)
+    payment_method = Column(Text)
+    notes = Column(Text)
+
+    __table_args__ = (Index("ix_orders_archive_outlet_placed", "outlet_id", "placed_at"),)
+
+
+class RevenueHourly(Base):
+    """Revenue per outlet, UTC hour and currency, kept current by order writes"""
+    __tablename__ = "revenue_hourly"
+
+    outlet_id = Column(Integer, primary_key=True)
+    # placed_at truncated to the hour: "YYYY-MM-DDTHH"
+    hour = Column(Text, primary_key=True)
+    currency = Column(Text, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue_cents = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_revenue_hourly_hour", "hour"),)
+
+
+class ChangeSequence(Base):
+    """Counter behind change_seq; every tracked insert, update and delete takes the next value"""
+    __tablename__ = "change_sequence"
+
+    name = Column(Text, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class CatalogTombstone(Base):
+    """Deleted outlets and menu items, so delta sync clients can drop them too"""
+    __tablename__ = "catalog_tombstones"
+
+    change_seq = Column(Integer, primary_key=True)
+    entity = Column(Text, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(Text, nullable=False)
+
+
+class CacheVersion(Base):
+    """Per-scope version counters that workers poll to invalidate cached reads"""
+    __tablename__ = "cache_versions"
+
+    scope = Column(Text, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class SchemaMeta(Base):
+    """Key/value bookkeeping for the schema itself, e.g. its fingerprint"""
+    __tablename__ = "schema_meta"
+
+    key = Column(Text, primary_key=True)
+    value = Column(Text, nullable=False)
+
+
+# Idempotent schema changes that create_all cannot express (new columns on
+# existing tables, triggers, ...). Append new ones; their names feed the
+# schema fingerprint so adding one forces the DDL path on the next start.
+def create_missing_indexes(conn: Connection) -> None:
+    """create_all skips indexes added to tables that already exist"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def drop_superseded_indexes(conn: Connection) -> None:
+    """ix_orders_open_queue keyed on is_completed, which cancelled orders never set"""
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_orders_open_queue")
+
+
+def _columns(conn: Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def store_money_as_minor_units(conn: Connection) -> None:
+    """Float price columns become integer cents; see app/money.py"""
+    for table, old, new in (
+        ("menu_items", "price", "price_cents"),
+        ("orders", "total_price", "total_price_cents"),
+        ("orders_archive", "total_price", "total_price_cents"),
+    ):
+        if old not in _columns(conn, table):
+            continue
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {new} INTEGER NOT NULL DEFAULT 0")
+        conn.exec_driver_sql(f"UPDATE {table} SET {new} = CAST(round({old} * 100) AS INTEGER)")
+        conn.exec_driver_sql(f"ALTER TABLE {table} DROP COLUMN {old}")
+    if "revenue" in _columns(conn, "revenue_hourly"):
+        # Derived data: recreated here and refilled by rebuild_revenue_buckets
+        RevenueHourly.__table__.drop(conn)
+        RevenueHourly.__table__.create(conn)
+
+
+def add_missing_columns(conn: Connection) -> None:
+    """create_all skips new nullable columns on tables that already exist"""
+    for table in Base.metadata.sorted_tables:
+        existing = _columns(conn, table.name)
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+
+
+CHANGE_TRACKED_TABLES = ("java_outlets", "menu_items")
+# Updates to only these columns are not catalog changes. stock moves with
+# every sale; delta sync sees the is_available flip when it runs out.
+UNTRACKED_COLUMNS = ("id", "change_seq", "updated_at", "stock")
+_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+_NEXT_CHANGE = "UPDATE change_sequence SET value = value + 1 WHERE name = 'catalog';"
+_CURRENT_CHANGE = "(SELECT value FROM change_sequence WHERE name = 'catalog')"
+
+
+def create_change_tracking_triggers(conn: Connection) -> None:
+    """Stamp change_seq/updated_at on every write and record tombstones for deletes.
+
+    Triggers are recreated so they follow the current column list. Rows that
+    predate tracking get distinct sequence numbers in id order.
+    """
+    conn.exec_driver_sql("INSERT OR IGNORE INTO change_sequence (name, value) VALUES ('catalog', 0)")
+    for table in CHANGE_TRACKED_TABLES:
+        untracked = conn.exec_driver_sql(f"SELECT count(*) FROM {table} WHERE change_seq IS NULL").scalar()
+        if untracked:
+            conn.exec_driver_sql(
+                f"UPDATE {table} SET change_seq = {_CURRENT_CHANGE} + numbered.n, updated_at = {_NOW} "
+                f"FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM {table} WHERE change_seq IS NULL) "
+                f"AS numbered WHERE {table}.id = numbered.id"
+            )
+            conn.exec_driver_sql(f"UPDATE change_sequence SET value = value + {untracked} WHERE name = 'catalog'")
+
+        stamp = (
+            f"{_NEXT_CHANGE} UPDATE {table} SET change_seq = {_CURRENT_CHANGE}, updated_at = {_NOW} "
+            f"WHERE id = NEW.id;"
+        )
+        data_columns = [
+            column.name for column in Base.metadata.tables[table].columns
+            if column.name not in UNTRACKED_COLUMNS
+        ]
+        changed = " OR ".join(f"OLD.{name} IS NOT NEW.{name}" for name in data_columns)
+        for name, trigger in (
+            ("insert", f"AFTER INSERT ON {table} BEGIN {stamp} END"),
+            # Only data columns, so the stamp itself does not fire the trigger
+            # again, and only when a value actually changed
+            (
+                "update",
+                f"AFTER UPDATE OF {', '.join(data_columns)} ON {table} WHEN {changed} BEGIN {stamp} END",
+            ),
+            (
+                "delete",
+                f"AFTER DELETE ON {table} BEGIN {_NEXT_CHANGE} "
+                f"INSERT INTO catalog_tombstones (change_seq, entity, entity_id, deleted_at) "
+                f"VALUES ({_CURRENT_CHANGE}, '{table}', OLD.id, {_NOW}); END",
+            ),
+        ):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS trg_{table}_change_{name}")
+            conn.exec_driver_sql(f"CREATE TRIGGER trg_{table}_change_{name} {trigger}")
+
+
+def rebuild_revenue_buckets(conn: Connection) -> None:
+    """Recompute revenue_hourly from every order; order writes keep it current afterwards"""
+    conn.exec_driver_sql("DELETE FROM revenue_hourly")
+    conn.exec_driver_sql(
+        "INSERT INTO revenue_hourly (outlet_id, hour, currency, order_count, revenue_cents) "
+        "SELECT outlet_id, substr(placed_at, 1, 13), currency, count(*), sum(total_price_cents) "
+        "FROM (SELECT outlet_id, placed_at, currency, total_price_cents, status FROM orders "
+        "UNION ALL SELECT outlet_id, placed_at, currency, total_price_cents, status FROM orders_archive) "
+        "WHERE status != 'cancelled' GROUP BY 1, 2, 3"
+    )
+
+
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    drop_superseded_indexes,
+    store_money_as_minor_units,
+    add_missing_columns,
+    create_missing_indexes,
+    create_change_tracking_triggers,
+    rebuild_revenue_buckets,
+]
     
        
-engine = create_async_engine(DB_url, echo=True)
+engine = create_async_engine(DB_url, echo=config.DB_ECHO)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers in other workers proceed while one worker writes"""
+    cursor = dbapi_connection.cursor()
+    # Only takes effect on a new, empty file; lets maintenance reclaim free pages
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+# Order sharding. SQLite allows one writer per file, so order writes are
+# spread over one file per value of ORDER_SHARD_KEY, each with its own
+# engine and write lock. Shard 0 is the main file, which also keeps the
+# catalog (outlets and menus) and the orders of unlisted key values. Every
+# shard file gets the full schema; only the order tables (orders,
+# orders_archive, revenue_hourly) are used outside the main file.
+#
+# Order ids stay routable without a lookup: shard i hands out ids above
+# i * ORDER_ID_BLOCK.
+ORDER_ID_BLOCK = 10**12
+shard_by_key: dict[str, int] = {}
+shard_engines: list = []
+shard_session_makers: list = []
+
+
+def configure_shards(files: dict[str, str]) -> None:
+    """Create an engine per shard file; the position in ``files`` is the shard number"""
+    if config.ORDER_SHARD_KEY not in JavaOutletBase.__table__.c:
+        raise ValueError(f"ORDER_SHARD_KEY {config.ORDER_SHARD_KEY!r} is not an outlet column")
+    shard_by_key.clear()
+    shard_engines.clear()
+    shard_session_makers.clear()
+    for index, (key, path) in enumerate(files.items(), start=1):
+        shard_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=config.DB_ECHO)
+        event.listen(shard_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        shard_by_key[key] = index
+        shard_engines.append(shard_engine)
+        shard_session_makers.append(async_sessionmaker(shard_engine, expire_on_commit=False, class_=AsyncSession))
+
+
+configure_shards(config.ORDER_SHARDS)
+
+
+def shard_count() -> int:
+    return 1 + len(shard_engines)
+
+
+def shard_paths() -> list[str]:
+    return [shard_engine.url.database for shard_engine in shard_engines]
+
+
+async def init_shards() -> None:
+    for shard_engine in shard_engines:
+        await init_db(shard_engine)
+
+
+async def shard_for_outlet(outlet_id: int) -> int:
+    """Shard holding the outlet's orders; unknown outlets map to the main file"""
+    if not shard_engines:
+        return 0
+    version, shard = cache.lookup(OUTLETS_SCOPE, ("shard", outlet_id))
+    if shard is None:
+        async def _shard_key(session):
+            outlets = JavaOutletBase.__table__
+            result = await session.execute(
+                select(outlets.c[config.ORDER_SHARD_KEY]).where(outlets.c.id == outlet_id)
+            )
+            return result.scalar()
+
+        shard = shard_by_key.get(await run_db_operation(_shard_key), 0)
+        cache.put(OUTLETS_SCOPE, ("shard", outlet_id), shard, version)
+    return shard
+
+
+def shard_for_order(order_id: int) -> int:
+    shard = (order_id - 1) // ORDER_ID_BLOCK
+    return shard if 0 < shard < shard_count() else 0
+
+
+def next_order_id(shard: int):
+    """Id expression for an order inserted on a shard; None lets SQLite choose in the main file"""
+    if shard == 0:
+        return None
+    floor = shard * ORDER_ID_BLOCK
+    newest = [
+        func.coalesce(select(func.max(table.c.id)).scalar_subquery(), floor)
+        for table in (Orders.__table__, OrdersArchive.__table__)
+    ]
+    # Archived ids count too, so moving the newest orders away never frees an id
+    return func.max(*newest) + 1
+
+
+async def fan_out(operation) -> list:
+    """Run a read on every shard concurrently; results are in shard order"""
+    return await asyncio.gather(*(run_db_operation(operation, shard=shard) for shard in range(shard_count())))
+
+
+def database_path() -> str | None:
+    """Filesystem path of the SQLite database, or None for in-memory databases"""
+    path = engine.url.database
+    if not path or path == ":memory:":
+        return None
+    return path
  
 
     
@@ -86,10 +432,64 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session   
         
-async def run_db_operation(operation):
-    """Execute db operations asynchronously"""  
+_in_flight = 0
+
+
+def in_flight_operations() -> int:
+    """Number of run_db_operation calls currently holding a session"""
+    return _in_flight
+
+        
+async def _run_within_deadline(session: AsyncSession, operation, commit: bool, timeout: float):
+    """Run the operation, interrupting its SQLite statement if the deadline passes"""
     try:
-        async with async_session_maker() as session:
+        # Waiting for a pooled connection counts against the deadline too
+        async with asyncio.timeout(timeout):
+            connection = await session.connection()
+    except TimeoutError:
+        raise deadlines.exceeded() from None
+    driver_connection = (await connection.get_raw_connection()).driver_connection
+    interrupt = None
+
+    def _interrupt():
+        # sqlite3's interrupt() is safe to call from any thread; the running
+        # statement in aiosqlite's worker fails with "interrupted", which
+        # leaves the connection clean for rollback and reuse. Cancelling the
+        # task instead would leave the statement running.
+        nonlocal interrupt
+        interrupt = asyncio.ensure_future(driver_connection.interrupt())
+
+    remaining = deadlines.remaining()
+    if remaining <= 0:
+        raise deadlines.exceeded()
+    timer = asyncio.get_running_loop().call_later(remaining, _interrupt)
+    try:
+        result = await operation(session)
+        if commit:
+            await session.commit()
+        return result
+    except SQLAlchemyError:
+        if interrupt is None:
+            raise
+        await interrupt
+        await session.rollback()
+        raise deadlines.exceeded(interrupted=True) from None
+    finally:
+        timer.cancel()
+
+        
+async def run_db_operation(operation, commit: bool = False, shard: int = 0):
+    """Execute db operations asynchronously, on the main file or an order shard"""  
+    global _in_flight
+    timeout = deadlines.remaining()
+    if timeout is not None and timeout <= 0:
+        raise deadlines.exceeded()
+    _in_flight += 1
+    try:
+        session_maker = async_session_maker if shard == 0 else shard_session_makers[shard - 1]
+        async with session_maker() as session:
+            if timeout is not None:
+                return await _run_within_deadline(session, operation, commit, timeout)
             result = await operation(session)
             if commit:
                 await session.commit()
@@ -97,16 +497,93 @@ async def run_db_operation(operation):
     except SQLAlchemyError as e:
         await session.rollback()
         raise e        
+    finally:
+        _in_flight -= 1
+
+
+async def bump_cache_versions(session: AsyncSession, *scopes: str) -> None:
+    """Mark cached reads for the given scopes stale in every worker.
+
+    Call this inside the same transaction as the write so readers never see
+    the new version before the data it describes.
+    """
+    for scope in scopes:
+        statement = sqlite_insert(CacheVersion).values(scope=scope, version=1)
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CacheVersion.scope],
+                set_={"version": CacheVersion.version + 1},
+            )
+        )
             
     
-async def init_db() -> None:
-    #Initialize the database
+def schema_fingerprint() -> str:
+    """Hash of the DDL the models would emit plus the registered migrations"""
+    dialect = engine.dialect
+    parts = []
+    for table in Base.metadata.sorted_tables:
+        parts.append(str(CreateTable(table).compile(dialect=dialect)))
+        parts.extend(
+            str(CreateIndex(index).compile(dialect=dialect))
+            for index in sorted(table.indexes, key=lambda index: index.name)
+        )
+    parts.extend(migration.__name__ for migration in MIGRATIONS)
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def _stored_fingerprint(conn: Connection) -> str | None:
+    has_meta = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_meta'"
+    ).first()
+    if has_meta is None:
+        return None
+    return conn.execute(
+        select(SchemaMeta.value).where(SchemaMeta.key == "schema_fingerprint")
+    ).scalar()
+
+
+def _apply_schema(conn: Connection, fingerprint: str) -> None:
+    Base.metadata.create_all(conn)
+    for migration in MIGRATIONS:
+        migration(conn)
+    conn.execute(
+        sqlite_insert(SchemaMeta)
+        .values(key="schema_fingerprint", value=fingerprint)
+        .on_conflict_do_update(index_elements=[SchemaMeta.key], set_={"value": fingerprint})
+    )
+
+    
+async def init_db(db_engine=None) -> bool:
+    """Initialize the database.
+
+    DDL only runs when the stored schema fingerprint differs from the
+    models, so restarts against an up-to-date file skip create_all.
+    Returns True when the schema was (re)applied.
+
+    Workers start together, so the DDL path takes SQLite's write lock with
+    BEGIN IMMEDIATE and re-reads the fingerprint under it: the first worker
+    applies the schema and the others find it current and skip.
+    """
     try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-    except Exception as e:
-        print(f"Error initializing database: {e}")
-        raise e              
+        fingerprint = schema_fingerprint()
+        async with (db_engine or engine).connect() as conn:
+            if await conn.run_sync(_stored_fingerprint) == fingerprint:
+                return False
+            await conn.rollback()
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                applied = await conn.run_sync(_stored_fingerprint) != fingerprint
+                if applied:
+                    await conn.run_sync(_apply_schema, fingerprint)
+                await conn.exec_driver_sql("COMMIT")
+            except Exception:
+                await conn.exec_driver_sql("ROLLBACK")
+                raise
+            return applied
+    except Exception:
+        logger.exception("Error initializing database")
+        raise
 
 
 
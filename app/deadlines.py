@@ -0,0 +1,83 @@
+"""Per-request deadlines that propagate into the database layer.
+
+The middleware stores an absolute deadline in a context variable.
+``run_db_operation`` reads it and, when it passes, interrupts the running
+SQLite statement so the connection goes back to the pool instead of working
+for a client that has already given up.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app import config
+from app.metrics import metrics
+
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised by the database layer; the app maps it to 504"""
+
+
+def deadline_seconds(route: str | None, header_value: str | None) -> float:
+    """Route default (or global default), shortened by the header if it asks for less.
+
+    Clients may only tighten a deadline: a longer one would let any caller
+    hold a pooled connection past what the route is budgeted for.
+    """
+    seconds = config.ROUTE_DEADLINES.get(route, config.REQUEST_DEADLINE_SECONDS)
+    if header_value:
+        try:
+            seconds = min(seconds, int(header_value) / 1000)
+        except ValueError:
+            pass
+    return max(0.0, seconds)
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def sub_deadline(seconds: float):
+    """A deadline for part of the work; never later than the request's own"""
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(deadline, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def without_deadline():
+    """For cleanup that has to run even when the request is out of time"""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds left for the current request, or None outside a request"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def exceeded(interrupted: bool = False) -> DeadlineExceeded:
+    """Count a cancelled request and build the error to raise"""
+    metrics.increment("requests_deadline_exceeded")
+    if interrupted:
+        metrics.increment("db_statements_interrupted")
+    return DeadlineExceeded()
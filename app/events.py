@@ -0,0 +1,128 @@
+"""In-process pub/sub hub for the live order feed.
+
+Order writes publish here after they commit. Each subscriber gets its own
+bounded queue. A subscriber whose queue is full is dropped instead of slowing
+publishers down, and it reconnects with the last event id it saw. Recent
+events are kept in a ring buffer so reconnecting clients can resume without
+gaps. Events only reach subscribers connected to the worker that handled the
+write.
+
+Event ids are "<epoch>-<sequence>". The epoch is random per hub, so a resume
+id issued by another worker (or before a restart) is recognised instead of
+being compared against an unrelated counter; such clients get a
+``feed.reset`` event telling them to reload the queue.
+"""
+import asyncio
+import json
+import secrets
+from collections import deque
+from dataclasses import dataclass, field
+
+from app import config
+
+
+@dataclass(frozen=True)
+class OrderEvent:
+    epoch: str
+    sequence: int
+    outlet_id: int
+    type: str
+    data: dict
+
+    @property
+    def id(self) -> str:
+        return f"{self.epoch}-{self.sequence}"
+
+    def as_sse(self) -> str:
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data)}\n\n"
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "type": self.type, "data": self.data}
+
+
+@dataclass(eq=False)
+class Subscription:
+    outlet_id: int
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(config.EVENT_QUEUE_SIZE))
+    dropped: bool = False
+
+    async def next_event(self, timeout: float) -> OrderEvent | None:
+        """Wait for the next event; None means the heartbeat interval passed"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+    @property
+    def finished(self) -> bool:
+        """Dropped subscribers end once they have drained what was queued"""
+        return self.dropped and self.queue.empty()
+
+
+class OrderEventHub:
+    def __init__(self, history_size: int = config.EVENT_HISTORY_SIZE):
+        self.epoch = secrets.token_hex(4)
+        self._last_sequence = 0
+        self._history: deque[OrderEvent] = deque(maxlen=history_size)
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self.dropped_subscribers = 0
+
+    def publish(self, outlet_id: int, event_type: str, data: dict) -> OrderEvent:
+        self._last_sequence += 1
+        event = OrderEvent(self.epoch, self._last_sequence, outlet_id, event_type, data)
+        self._history.append(event)
+        for subscription in list(self._subscribers.get(outlet_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+        return event
+
+    def subscribe(self, outlet_id: int, last_event_id: str | None = None) -> Subscription:
+        """Register a subscriber, replaying buffered events after last_event_id"""
+        subscription = Subscription(outlet_id)
+        resume_after = self._resume_sequence(last_event_id)
+        if resume_after is not None:
+            for event in self._history:
+                if event.sequence > resume_after and event.outlet_id == outlet_id:
+                    try:
+                        subscription.queue.put_nowait(event)
+                    except asyncio.QueueFull:
+                        # Too far behind to replay in one go; the client
+                        # resumes again from the last event it receives.
+                        subscription.dropped = True
+                        self.dropped_subscribers += 1
+                        return subscription
+        elif last_event_id:
+            # Issued by another worker or a previous boot: nothing here lines
+            # up with it, so have the client reload instead of missing events
+            subscription.queue.put_nowait(
+                OrderEvent(self.epoch, self._last_sequence, outlet_id, "feed.reset", {})
+            )
+        self._subscribers.setdefault(outlet_id, set()).add(subscription)
+        return subscription
+
+    def _resume_sequence(self, last_event_id: str | None) -> int | None:
+        """Sequence number of a resume id issued by this hub, otherwise None"""
+        epoch, _, sequence = (last_event_id or "").rpartition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.outlet_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.outlet_id]
+
+    def subscriber_count(self, outlet_id: int) -> int:
+        return len(self._subscribers.get(outlet_id, ()))
+
+    def _drop(self, subscription: Subscription) -> None:
+        subscription.dropped = True
+        self.dropped_subscribers += 1
+        self.unsubscribe(subscription)
+
+
+order_events = OrderEventHub()
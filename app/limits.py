@@ -0,0 +1,120 @@
+"""Admission control: per-client token buckets and global load shedding.
+
+Rate limiting keeps one noisy integration from starving everyone else.
+Load shedding turns requests away with 503 + Retry-After once too many DB
+operations are in flight, so latency degrades gracefully instead of
+requests queueing without bound in front of the single SQLite writer.
+"""
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.routing import Match
+
+from app import config
+from app.database import in_flight_operations
+
+# Cheap endpoints that must keep answering while the database is saturated
+UNLIMITED_PATH_PREFIXES = ("/health",)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, cost: float) -> float:
+        """Spend tokens; returns 0 when allowed, otherwise seconds until it would be"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+        cost = min(cost, self.capacity)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.refill_per_second
+
+
+class RateLimiter:
+    """Token bucket per client, bounded to the most recently seen clients"""
+
+    def __init__(
+        self,
+        capacity: float = config.RATE_LIMIT_BURST,
+        refill_per_second: float = config.RATE_LIMIT_PER_SECOND,
+        max_clients: int = config.RATE_LIMIT_MAX_CLIENTS,
+    ):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def take(self, client: str, cost: float) -> float:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.capacity, self.refill_per_second)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.take(cost)
+
+    def reset(self) -> None:
+        self._buckets.clear()
+
+
+rate_limiter = RateLimiter()
+
+
+def client_key(request: Request) -> str:
+    """Identify the caller by a configured API key, falling back to the client address"""
+    api_key = request.headers.get("x-api-key")
+    if api_key in config.API_KEYS:
+        return f"key:{api_key}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def route_key(request: Request) -> str | None:
+    """Key such as "GET /outlets/{outlet_id}/" for the route that will handle the request.
+
+    Resolved once per request and kept on request.state for the other middleware.
+    """
+    if hasattr(request.state, "route_key"):
+        return request.state.route_key
+    request.state.route_key = None
+    for route in request.app.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            request.state.route_key = f"{request.method} {route.path}"
+            break
+    return request.state.route_key
+
+
+def route_cost(request: Request) -> int:
+    """Token cost of the route the request will be dispatched to"""
+    return config.RATE_LIMIT_ROUTE_COSTS.get(route_key(request), 1)
+
+
+def admission_response(request: Request) -> JSONResponse | None:
+    """A 429/503 response when the request must not proceed, otherwise None"""
+    if request.url.path.startswith(UNLIMITED_PATH_PREFIXES):
+        return None
+    if in_flight_operations() >= config.DB_WORKER_MAX_IN_FLIGHT:
+        return JSONResponse(
+            {"detail": "Service overloaded, retry later"},
+            status_code=503,
+            headers={"Retry-After": str(config.LOAD_SHED_RETRY_AFTER_SECONDS)},
+        )
+    if config.RATE_LIMIT_ENABLED:
+        retry_after = rate_limiter.take(client_key(request), route_cost(request))
+        if retry_after:
+            return JSONResponse(
+                {"detail": "Rate limit exceeded"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+    return None
@@ -0,0 +1,157 @@
+"""Periodic SQLite housekeeping started from the lifespan.
+
+These jobs keep the database file and its query plans healthy:
+
+- ``wal_checkpoint`` copies the WAL back into the main file and truncates it.
+- ``optimize`` refreshes planner statistics where SQLite thinks they are stale.
+- ``incremental_vacuum`` returns free pages to the filesystem. It only does
+  something on files created with ``auto_vacuum=INCREMENTAL``; older files
+  need a one-off ``VACUUM`` to switch over.
+- ``archive_orders`` moves old finished orders to cold storage (app/archive.py).
+
+Jobs yield to foreground work: a due job waits while requests have DB
+operations in flight and is deferred to its next interval if they do not
+drain. Jobs run with ``busy_timeout=0``, so a checkpoint that would have to
+wait on readers reports "busy" instead of holding the write lock. Every
+worker runs its own scheduler; the jobs are cheap when there is nothing to
+do. Pragma jobs run against the main file and every order shard.
+"""
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from app import config, database
+from app.archive import archive_orders
+
+
+@dataclass(eq=False)
+class MaintenanceJob:
+    name: str
+    statements: tuple[str, ...]
+    interval_seconds: float
+    # Runs instead of the statements, for jobs that are more than a few pragmas
+    action: Callable[[], Awaitable] | None = None
+    last_run_at: str | None = None
+    last_duration_seconds: float | None = None
+    last_status: str = "never run"
+    last_result: list | None = None
+    next_due: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "last_run_at": self.last_run_at,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_status": self.last_status,
+            "last_result": self.last_result,
+        }
+
+
+def default_jobs() -> list[MaintenanceJob]:
+    return [
+        MaintenanceJob(
+            "wal_checkpoint",
+            ("PRAGMA wal_checkpoint(TRUNCATE)",),
+            config.WAL_CHECKPOINT_INTERVAL_SECONDS,
+        ),
+        MaintenanceJob(
+            "optimize",
+            (f"PRAGMA analysis_limit={config.ANALYSIS_LIMIT}", "PRAGMA optimize"),
+            config.OPTIMIZE_INTERVAL_SECONDS,
+        ),
+        MaintenanceJob(
+            "incremental_vacuum",
+            (f"PRAGMA incremental_vacuum({config.INCREMENTAL_VACUUM_PAGES})",),
+            config.INCREMENTAL_VACUUM_INTERVAL_SECONDS,
+        ),
+        MaintenanceJob(
+            "archive_orders",
+            (),
+            config.ORDER_ARCHIVE_INTERVAL_SECONDS,
+            action=archive_orders,
+        ),
+    ]
+
+
+class MaintenanceScheduler:
+    def __init__(self, jobs: list[MaintenanceJob] | None = None):
+        self.jobs = jobs if jobs is not None else default_jobs()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if not config.MAINTENANCE_ENABLED or database.database_path() is None:
+            return
+        now = time.monotonic()
+        for job in self.jobs:
+            job.next_due = now + job.interval_seconds
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_job(self, job: MaintenanceJob) -> None:
+        """Run one job now and record how it went"""
+        started = time.perf_counter()
+        job.last_run_at = datetime.now(timezone.utc).isoformat()
+        try:
+            if job.action is not None:
+                job.last_result = [await job.action()]
+                job.last_status = "ok"
+                return
+            rows = []
+            for engine in (database.engine, *database.shard_engines):
+                async with engine.connect() as conn:
+                    conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    await conn.exec_driver_sql("PRAGMA busy_timeout=0")
+                    try:
+                        for statement in job.statements:
+                            result = await conn.exec_driver_sql(statement)
+                            if result.returns_rows:
+                                rows.extend(list(row) for row in result.fetchall())
+                    finally:
+                        await conn.exec_driver_sql(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+            job.last_result = rows
+            # wal_checkpoint returns (busy, log pages, checkpointed pages)
+            busy = job.name == "wal_checkpoint" and any(row[0] for row in rows)
+            job.last_status = "busy" if busy else "ok"
+        except Exception as e:
+            job.last_status = f"error: {e}"
+        finally:
+            job.last_duration_seconds = time.perf_counter() - started
+
+    async def _wait_for_idle(self) -> bool:
+        """True once no request holds a DB session, False if that does not happen in time"""
+        deadline = time.monotonic() + config.MAINTENANCE_IDLE_WAIT_SECONDS
+        while database.in_flight_operations() > 0:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(config.MAINTENANCE_TICK_SECONDS)
+            for job in self.jobs:
+                now = time.monotonic()
+                if now < job.next_due:
+                    continue
+                job.next_due = now + job.interval_seconds
+                if await self._wait_for_idle():
+                    await self.run_job(job)
+                else:
+                    job.last_status = "deferred"
+
+    def status(self) -> dict:
+        return {job.name: job.as_dict() for job in self.jobs}
+
+
+maintenance = MaintenanceScheduler()
@@ -0,0 +1,20 @@
+from collections import Counter
+
+
+class Metrics:
+    """Process-local counters exposed at GET /metrics"""
+
+    def __init__(self):
+        self._counters: Counter[str] = Counter()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        self._counters[name] += amount
+
+    def get(self, name: str) -> int:
+        return self._counters[name]
+
+    def snapshot(self) -> dict[str, int]:
+        return dict(sorted(self._counters.items()))
+
+
+metrics = Metrics()
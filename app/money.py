@@ -0,0 +1,19 @@
+"""Money is stored as integer minor units (cents for KES).
+
+Sums in SQL and Python stay exact and no float ever reaches a ``Decimal``
+field. Convert only at the API edge: incoming ``Decimal`` amounts with
+``to_minor_units``, stored integers with ``from_minor_units``.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+# Every currency we sell in has two decimal places
+MINOR_UNITS_PER_UNIT = 100
+_CENT = Decimal("0.01")
+
+
+def to_minor_units(amount: Decimal | int | str) -> int:
+    return int((Decimal(amount) * MINOR_UNITS_PER_UNIT).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_minor_units(minor_units: int) -> Decimal:
+    return (Decimal(minor_units) / MINOR_UNITS_PER_UNIT).quantize(_CENT)
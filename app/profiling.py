@@ -0,0 +1,126 @@
+"""Opt-in cProfile capture of single requests.
+
+A request is profiled when it sends ``X-Profile: 1`` together with an
+``X-API-Key`` listed in ``ADMIN_API_KEYS``, or when it is picked by
+``PROFILE_SAMPLE_RATE``. The profile is dumped as a ``.prof`` file under
+``PROFILE_DIR`` (keeping the newest ``PROFILE_MAX_DUMPS``) for snakeviz or
+pstats, and a summary is kept for ``GET /admin/profiles``.
+
+The summary splits profiled CPU time into pydantic validation, SQLAlchemy
+and driver work, serialization and everything else. SQLite itself runs on
+aiosqlite's worker thread, which cProfile does not see; that shows up as
+the gap between ``wall_seconds`` and the profiled total.
+
+Only one request per worker is profiled at a time (the interpreter allows a
+single active profiler), and other requests interleaving on the event loop
+during that window appear in the profile too.
+"""
+import asyncio
+import cProfile
+import pstats
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+from fastapi import Request
+
+from app import config
+from app.limits import route_key
+
+PROFILE_HEADER = "x-profile"
+
+# Module prefixes of the code each category is attributed to
+CATEGORIES = {
+    "validation": ("pydantic", "pydantic_core", "fastapi/dependencies", "fastapi/_compat"),
+    "sql": ("sqlalchemy", "aiosqlite", "sqlite3", "app/database"),
+    "serialization": ("json", "fastapi/encoders", "fastapi/routing", "starlette/responses", "app/compression", "gzip"),
+}
+
+
+def is_admin(request: Request) -> bool:
+    return request.headers.get("x-api-key") in config.ADMIN_API_KEYS
+
+
+def wants_profile(request: Request) -> bool:
+    if request.headers.get(PROFILE_HEADER) == "1" and is_admin(request):
+        return True
+    return config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE
+
+
+def _category(filename: str) -> str:
+    path = filename.replace("\\", "/")
+    for category, prefixes in CATEGORIES.items():
+        if any(f"/{prefix}" in path for prefix in prefixes):
+            return category
+    return "other"
+
+
+def summarize(stats: pstats.Stats, limit: int) -> tuple[dict[str, float], list[dict]]:
+    """Seconds per category, and the functions with the most own time"""
+    categories = dict.fromkeys((*CATEGORIES, "other"), 0.0)
+    functions = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        categories[_category(filename)] += own
+        functions.append((own, cumulative, calls, f"{filename}:{line}({name})"))
+    functions.sort(reverse=True)
+    hotspots = [
+        {"function": function, "calls": calls, "own_seconds": own, "cumulative_seconds": cumulative}
+        for own, cumulative, calls, function in functions[:limit]
+    ]
+    return categories, hotspots
+
+
+def _write_dump(stats: pstats.Stats, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stats.dump_stats(path)
+    dumps = sorted(path.parent.glob("*.prof"))
+    for old in dumps[: max(0, len(dumps) - config.PROFILE_MAX_DUMPS)]:
+        old.unlink(missing_ok=True)
+
+
+class RequestProfiler:
+    def __init__(self, keep: int = config.PROFILE_MAX_DUMPS):
+        self.recent: deque[dict] = deque(maxlen=keep)
+        self._active = False
+
+    async def __call__(self, request: Request, call_next):
+        if self._active:
+            return await call_next(request)
+        self._active = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                response = await call_next(request)
+            finally:
+                profiler.disable()
+        finally:
+            self._active = False
+        wall_seconds = time.perf_counter() - started
+
+        stats = pstats.Stats(profiler)
+        categories, hotspots = summarize(stats, config.PROFILE_HOTSPOTS)
+        route = route_key(request) or request.url.path
+        now = datetime.now(timezone.utc)
+        slug = "".join(c if c.isalnum() else "_" for c in route).strip("_")
+        path = Path(config.PROFILE_DIR) / f"{now:%Y%m%dT%H%M%S%f}-{slug}.prof"
+        await asyncio.to_thread(_write_dump, stats, path)
+        self.recent.appendleft({
+            "route": route,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "profiled_at": now.isoformat(),
+            "wall_seconds": wall_seconds,
+            "profiled_seconds": stats.total_tt,
+            "categories": categories,
+            "hotspots": hotspots,
+            "dump": str(path),
+        })
+        response.headers["X-Profile-Dump"] = path.name
+        return response
+
+
+profiler = RequestProfiler()
@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field, condecimal, conint, constr, ConfigDict
+from pydantic import BaseModel, Field, condecimal, conint, constr, ConfigDict, create_model
 
 CurrencyCode = constr(min_length=3, max_length=3)
 PhoneNumber = constr(min_length=7, max_length=20)
@@ -24,6 +25,33 @@ class JavaOutlet(BaseModel):
     
 class JavaOutletList(BaseModel):
     outlets: List[JavaOutlet]
+
+
+@lru_cache(maxsize=128)
+def partial_outlet_model(fields: tuple[str, ...]) -> type[BaseModel]:
+    """JavaOutlet restricted to the requested fields, used for ?fields= projections"""
+    return create_model(
+        "JavaOutletFields",
+        __config__=ConfigDict(extra='ignore'),
+        **{name: (JavaOutlet.model_fields[name].annotation, JavaOutlet.model_fields[name]) for name in fields},
+    )
+
+
+# OpenAPI shape of ?fields= responses: any subset of the JavaOutlet fields
+JavaOutletPartial = create_model(
+    "JavaOutletPartial",
+    **{name: (Optional[field.annotation], None) for name, field in JavaOutlet.model_fields.items()},
+)
+
+
+class JavaOutletPartialList(BaseModel):
+    outlets: List[JavaOutletPartial]
+
+
+class JavaOutletBatch(BaseModel):
+    """Outlets in the order their ids were requested; null where an id was not found"""
+    outlets: List[Optional[JavaOutletPartial]]
+    missing: List[int]
     
 class JavaOutletCreate(BaseModel):
     name: str
@@ -36,6 +64,13 @@ class JavaOutletCreate(BaseModel):
     is_open: int
     opening_time: str | None = None
     closing_time: str | None = None
+
+
+class OutletSyncResult(BaseModel):
+    inserted: int
+    updated: int
+    unchanged: int
+    closed: int
     
 class JavaOutletMenuItem(BaseModel):
     id: int
@@ -48,6 +83,7 @@ class JavaOutletMenuItem(BaseModel):
     is_available: bool
     has_dairy: bool = False
     is_seasonal: bool = False
+    stock: Optional[int] = None
 
 
 class JavaOutletProduct(JavaOutletMenuItem):
@@ -59,6 +95,29 @@ class JavaOutletWithMenu(BaseModel):
     menu_items: List[JavaOutletMenuItem]
 
 
+class Tombstone(BaseModel):
+    entity: Literal["java_outlets", "menu_items"]
+    id: int
+    change_seq: int
+    deleted_at: datetime
+
+
+class CatalogSnapshot(BaseModel):
+    """Every outlet with its menu, as of catalog change ``version``"""
+    version: int
+    generated_at: str
+    outlets: List[JavaOutletWithMenu]
+
+
+class OutletChanges(BaseModel):
+    """Rows changed after ``since``; resume with ``next_since`` while ``has_more``"""
+    outlets: List[JavaOutlet]
+    menu_items: List[JavaOutletMenuItem]
+    deleted: List[Tombstone]
+    next_since: int
+    has_more: bool
+
+
 class JavaOutletWithProducts(BaseModel):
     """Backward-compatible response for outlet menu items."""
     outlet: JavaOutlet
@@ -74,11 +133,35 @@ class JavaOutletMenuItemCreate(BaseModel):
     is_available: bool
     has_dairy: bool = False
     is_seasonal: bool = False
+    stock: Optional[conint(ge=0)] = Field(default=None, description="Units on hand; omit to not count stock")
+
+
+class MenuItemRestock(BaseModel):
+    quantity: conint(gt=0)
 
 
 class JavaOutletProductCreate(JavaOutletMenuItemCreate):
     """Backward-compatible alias for menu item creation per outlet branch."""
     pass
+
+
+class MenuItemFilter(BaseModel):
+    """Menu items matching every given field; at least one is required"""
+    sku: Optional[constr(min_length=2, max_length=40)] = None
+    category: Optional[constr(min_length=2, max_length=80)] = None
+    outlet_ids: Optional[List[int]] = None
+
+
+class JavaOutletMenuItemBulkUpdate(BaseModel):
+    """One change applied to every matching menu item"""
+    filter: MenuItemFilter
+    set_price: Optional[condecimal(max_digits=8, decimal_places=2, gt=0)] = None
+    price_change_percent: Optional[condecimal(max_digits=5, decimal_places=2, gt=-100, le=1000)] = None
+    is_available: Optional[bool] = None
+
+
+class MenuItemBulkUpdateResult(BaseModel):
+    updated: int
     
 #Order related schemas
 class JavaOutletOrder(BaseModel):
@@ -102,9 +185,84 @@ class JavaOutletOrderCreate(BaseModel):
     notes: Optional[constr(max_length=280)] = None
 
 
+OrderStatus = Literal["pending", "preparing", "ready", "completed", "cancelled"]
+
+
+class JavaOutletOrderStatusUpdate(BaseModel):
+    """Compare-and-set status change; applied only if the order is still in expected_status"""
+    expected_status: OrderStatus
+    status: OrderStatus
+
+
+class JavaOutletQueue(BaseModel):
+    outlet_id: int
+    orders: List[JavaOutletOrder]
+
+
+class JavaOutletOrderHistory(BaseModel):
+    outlet_id: int
+    orders: List[JavaOutletOrder]
+
+
+RevenueGranularity = Literal["hour", "day"]
+
+
+class RevenueBucket(BaseModel):
+    outlet_id: int
+    period_start: datetime
+    currency: CurrencyCode
+    order_count: int
+    revenue: condecimal(max_digits=14, decimal_places=2)
+
+
+class RevenueReport(BaseModel):
+    granularity: RevenueGranularity
+    buckets: List[RevenueBucket]
+
+
+TopItemsSort = Literal["units", "revenue"]
+
+
+class TopItem(BaseModel):
+    product: str
+    sku: Optional[str] = None
+    currency: CurrencyCode
+    units: int
+    revenue: condecimal(max_digits=14, decimal_places=2)
+
+
+class CountyTopItems(BaseModel):
+    county: str
+    items: List[TopItem]
+
+
+class TopItemsReport(BaseModel):
+    days: int
+    sort: TopItemsSort
+    counties: List[CountyTopItems]
+
+
 class JavaOutletOrderSummary(BaseModel):
     outlet_id: int
     outlet_name: str
     total_orders: conint(ge=0)
     total_revenue: condecimal(max_digits=12, decimal_places=2)
     currency: CurrencyCode = "KES"
+
+
+class DashboardSection(BaseModel):
+    status: Literal["ok", "timeout", "error"]
+    latency_ms: float
+    detail: Optional[str] = None
+
+
+class OutletDashboard(BaseModel):
+    """Outlet detail, menu, today's order totals and open queue; null sections failed"""
+    outlet_id: int
+    outlet: Optional[JavaOutlet]
+    menu_items: Optional[List[JavaOutletMenuItem]]
+    order_summary: Optional[JavaOutletOrderSummary]
+    queue: Optional[List[JavaOutletOrder]]
+    sections: Dict[str, DashboardSection]
+    # Sections are read concurrently, so this is the slowest one, not the sum
+    latency_ms: float
@@ -0,0 +1,177 @@
+"""Pre-built catalog snapshot files for CDN edges and POS devices.
+
+The full outlet and menu catalog is serialized once per catalog version and
+written next to a gzipped copy, so ``GET /catalog/snapshot`` is a plain
+``FileResponse``: Starlette serves Range requests from it, and servers that
+offer the ``http.response.pathsend`` extension send it without copying
+through Python.
+
+The version is the ``catalog`` change sequence that the change tracking
+triggers advance on every outlet or menu insert, update and delete, so it
+moves with any write, from any worker. Catalog writes on this worker
+schedule a rebuild once writes have been quiet for
+``CATALOG_SNAPSHOT_DEBOUNCE_SECONDS``; a request that finds no file for the
+current version builds it on the spot, shared with concurrent requests.
+"""
+import asyncio
+import contextvars
+import gzip
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app import config
+from app.coalesce import single_flight
+from app.database import ChangeSequence, JavaOutletBase, MenuItems, run_db_operation
+from app.money import from_minor_units
+from app.schema import CatalogSnapshot, JavaOutlet, JavaOutletMenuItem
+
+logger = logging.getLogger(__name__)
+
+outlets_table = JavaOutletBase.__table__
+menu_items_table = MenuItems.__table__
+
+MENU_ITEM_COLUMNS = [
+    menu_items_table.c["price_cents" if name == "price" else name] for name in JavaOutletMenuItem.model_fields
+]
+
+
+async def catalog_version(session) -> int:
+    result = await session.execute(select(ChangeSequence.value).where(ChangeSequence.name == "catalog"))
+    return result.scalar() or 0
+
+
+@dataclass(frozen=True)
+class SnapshotFiles:
+    version: int
+    json_path: Path
+    gzip_path: Path
+
+    @property
+    def etag(self) -> str:
+        return f'"catalog-{self.version}"'
+
+    @property
+    def gzip_etag(self) -> str:
+        return f'"catalog-{self.version}-gzip"'
+
+
+class CatalogSnapshots:
+    def __init__(
+        self,
+        directory: str = config.CATALOG_SNAPSHOT_DIR,
+        debounce_seconds: float = config.CATALOG_SNAPSHOT_DEBOUNCE_SECONDS,
+        keep: int = config.CATALOG_SNAPSHOT_KEEP,
+    ):
+        self.directory = Path(directory)
+        self.debounce_seconds = debounce_seconds
+        self.keep = keep
+        self._started = False
+        self._dirty = False
+        self._task: asyncio.Task | None = None
+
+    def files(self, version: int) -> SnapshotFiles:
+        name = f"catalog-{version:012d}.json"
+        return SnapshotFiles(version, self.directory / name, self.directory / f"{name}.gz")
+
+    async def current(self) -> SnapshotFiles:
+        """Files for the current catalog version, building them if needed"""
+        files = self.files(await run_db_operation(catalog_version))
+        # The gzip file is written last, so it existing means both do
+        if not files.gzip_path.exists():
+            files = await single_flight.run(("catalog-snapshot", files.version), self.build)
+        return files
+
+    async def build(self) -> SnapshotFiles:
+        async def _load(session):
+            # Re-read until the version did not move while the rows were read
+            while True:
+                version = await catalog_version(session)
+                outlets = await session.execute(
+                    select(*(outlets_table.c[name] for name in JavaOutlet.model_fields)).order_by(outlets_table.c.id)
+                )
+                outlets = outlets.mappings().all()
+                menu_items = await session.execute(
+                    select(*MENU_ITEM_COLUMNS).order_by(
+                        menu_items_table.c.outlet_id, menu_items_table.c.category, menu_items_table.c.menu_item_name
+                    )
+                )
+                menu_items = menu_items.mappings().all()
+                if await catalog_version(session) == version:
+                    return version, outlets, menu_items
+
+        version, outlets, menu_items = await run_db_operation(_load)
+        files = self.files(version)
+        if not files.gzip_path.exists():
+            await asyncio.to_thread(self._write, files, outlets, menu_items)
+        return files
+
+    def _write(self, files: SnapshotFiles, outlets, menu_items) -> None:
+        menus = {outlet["id"]: [] for outlet in outlets}
+        for row in menu_items:
+            menu_item = dict(row)
+            menu_item["price"] = from_minor_units(menu_item.pop("price_cents"))
+            menus.setdefault(menu_item["outlet_id"], []).append(menu_item)
+        content = CatalogSnapshot(
+            version=files.version,
+            generated_at=datetime.now(timezone.utc).isoformat(),
+            outlets=[{"outlet": outlet, "menu_items": menus[outlet["id"]]} for outlet in outlets],
+        ).model_dump_json().encode()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name and rename, so readers never see a
+        # partial file; workers racing on the same version write identical bytes
+        for path, data in (
+            (files.json_path, content),
+            (files.gzip_path, gzip.compress(content, compresslevel=9, mtime=0)),
+        ):
+            temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            temporary.write_bytes(data)
+            os.replace(temporary, path)
+        self._prune()
+
+    def _prune(self) -> None:
+        versions = sorted({path.name.split(".")[0] for path in self.directory.glob("catalog-*.json*")})
+        for stale in versions[: max(0, len(versions) - self.keep)]:
+            for path in self.directory.glob(f"{stale}.json*"):
+                path.unlink(missing_ok=True)
+
+    def start(self) -> None:
+        self._started = True
+
+    async def stop(self) -> None:
+        self._started = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def schedule(self) -> None:
+        """Note a catalog write; a burst of writes leads to one rebuild"""
+        if not self._started:
+            return
+        self._dirty = True
+        if self._task is None or self._task.done():
+            # A fresh context, so the build does not inherit the request's deadline
+            self._task = asyncio.create_task(self._rebuild_when_quiet(), context=contextvars.Context())
+
+    async def _rebuild_when_quiet(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            await asyncio.sleep(self.debounce_seconds)
+            if self._dirty:
+                continue
+            try:
+                await self.build()
+            except Exception:
+                logger.exception("Catalog snapshot build failed")
+
+
+catalog_snapshots = CatalogSnapshots()
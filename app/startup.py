@@ -0,0 +1,29 @@
+import time
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class StartupReport:
+    """Cold start timings for the current worker, in seconds"""
+    import_seconds: float | None = None
+    db_init_seconds: float | None = None
+    schema_applied: bool | None = None
+    first_request_seconds: float | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+report = StartupReport()
+
+
+class Stopwatch:
+    """Context manager that measures elapsed wall time"""
+
+    def __enter__(self) -> "Stopwatch":
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.seconds = time.perf_counter() - self.started
@@ -1,5 +1,16 @@
 import uvicorn
 
+from app import config
+
 
 if __name__ == "__main__":
-    uvicorn.run(app="app.app:app", host="0.0.0.0", port=8000, reload=True)
+    if config.RELOAD:
+        # The reloader only supports a single worker process
+        uvicorn.run(app="app.app:app", host=config.HOST, port=config.PORT, reload=True)
+    else:
+        uvicorn.run(
+            app="app.app:app",
+            host=config.HOST,
+            port=config.PORT,
+            workers=config.WEB_CONCURRENCY,
+        )
@@ -0,0 +1,75 @@
+import asyncio
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.limits import rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Every test starts with full token buckets for the shared test client"""
+    rate_limiter.reset()
+    yield
+
+
+class QueryBudget:
+    """Statements an engine ran, checked against a count and a no-SCAN rule"""
+
+    def __init__(self, path):
+        self.path = path
+        self.statements: list[tuple[str, tuple]] = []
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        self.statements.append((statement, tuple(parameters or ())))
+
+    def query_plans(self) -> list[tuple[str, str]]:
+        """(statement, EXPLAIN QUERY PLAN details) for each recorded DML statement"""
+        plans = []
+        with sqlite3.connect(self.path) as conn:
+            for statement, parameters in self.statements:
+                if not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")):
+                    continue
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                plans.append((statement, " | ".join(row[-1] for row in rows)))
+        return plans
+
+    @contextmanager
+    def expect(self, max_queries: int, allow_scans: tuple[str, ...] = ()):
+        """Fail if the block runs more than max_queries statements or full-scans a table.
+
+        ``allow_scans`` names tables a full scan is the point of, such as the
+        unfiltered outlet list.
+        """
+        self.statements.clear()
+        yield self
+        statements = list(self.statements)
+        assert len(statements) <= max_queries, (
+            f"{len(statements)} statements, budget is {max_queries}:\n"
+            + "\n".join(statement for statement, _ in statements)
+        )
+        for statement, plan in self.query_plans():
+            for step in plan.split(" | "):
+                if not step.startswith("SCAN "):
+                    continue
+                table = step.split()[1]
+                assert table in allow_scans, f"full scan of {table}:\n{statement}\n{plan}"
+
+
+@pytest.fixture
+def query_budget(tmp_path, monkeypatch):
+    """Run the app against a real temp SQLite file and record every statement"""
+    path = tmp_path / "budget.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+    asyncio.run(database.init_db(engine))
+    budget = QueryBudget(path)
+    event.listen(engine.sync_engine, "before_cursor_execute", budget.record)
+    yield budget
+    asyncio.run(engine.dispose())
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import logging
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import config
+from app.access_log import JsonFormatter, LogPipeline, RequestStats, begin_request, log_request
+from app.app import app
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+def test_statements_are_attributed_to_the_request(tmp_path):
+    """Cursor events count statements and DB time for the current request"""
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+        try:
+            stats = begin_request()
+            async with AsyncSession(engine) as session:
+                await session.execute(text("SELECT 1"))
+                await session.execute(text("SELECT 2"))
+            return stats
+        finally:
+            await engine.dispose()
+
+    stats = asyncio.run(scenario())
+
+    assert stats.queries == 2
+    assert stats.db_seconds > 0
+
+
+def test_pipeline_writes_json_lines_off_the_caller():
+    """Records pass through the queue and come out as one JSON object each"""
+    handler = ListHandler()
+    pipeline = LogPipeline()
+    pipeline.start(handler)
+    try:
+        log_request("GET /outlets/", "GET", "/outlets/", 200, 0.0125, RequestStats(3, 0.004, 1))
+    finally:
+        pipeline.stop()
+
+    entry = json.loads(handler.lines[0])
+    assert entry["logger"] == "app.access"
+    assert entry["route"] == "GET /outlets/"
+    assert entry["status"] == 200
+    assert entry["duration_ms"] == 12.5
+    assert entry["db_ms"] == 4.0
+    assert entry["queries"] == 3
+    assert entry["cache_hits"] == 1
+
+
+def test_successes_are_sampled_and_errors_always_logged(monkeypatch, caplog):
+    monkeypatch.setattr(config, "ACCESS_LOG_SAMPLE_RATE", 0.0)
+
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        log_request("GET /", "GET", "/", 200, 0.001, RequestStats())
+        log_request("GET /", "GET", "/", 500, 0.001, RequestStats())
+
+    assert [record.access["status"] for record in caplog.records] == [500]
+
+
+def test_middleware_logs_route_and_status(caplog):
+    client = TestClient(app)
+
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        client.get("/")
+
+    access = [record.access for record in caplog.records if record.name == "app.access"]
+    assert access[-1]["route"] == "GET /"
+    assert access[-1]["status"] == 200
+
+
+def test_formatter_includes_exception_text():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.getLogger("app.database").makeRecord(
+            "app.database", logging.ERROR, __file__, 1, "Error initializing database", None, sys.exc_info()
+        )
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Error initializing database"
+    assert "ValueError: boom" in entry["exception"]
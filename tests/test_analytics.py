@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.app import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client backed by a real SQLite file with one outlet and two menu items"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'analytics.db'}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+
+    async def seed():
+        await database.init_db(engine)
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert(database.JavaOutletBase.__table__).values(
+                    id=1, name="Java Junction", location="CBD", city="Nairobi", county="Nairobi", is_open=1
+                )
+            )
+
+    asyncio.run(seed())
+    client = TestClient(app)
+    for name, price in (("Latte", "350.10"), ("Croissant", "250.20")):
+        response = client.post(
+            "/menu-items/", json={"outlet_id": 1, "menu_item_name": name, "price": price, "is_available": True}
+        )
+        assert response.status_code == 201
+    yield client
+    asyncio.run(engine.dispose())
+
+
+def place_order(client, product_ids):
+    response = client.post("/orders/", json={"outlet_id": 1, "product_ids": product_ids})
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_orders_update_hourly_buckets(client):
+    """Placed orders are added to their hour; cancelled ones are taken out again"""
+    place_order(client, [1, 2])
+    place_order(client, [1])
+    cancelled = place_order(client, [2, 2])
+    client.patch(f"/orders/{cancelled['id']}/status", json={"expected_status": "pending", "status": "cancelled"})
+
+    response = client.get("/analytics/revenue", params={"outlet_id": 1})
+
+    assert response.status_code == 200
+    [bucket] = response.json()["buckets"]
+    assert bucket["order_count"] == 2
+    assert Decimal(bucket["revenue"]) == Decimal("950.40")
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    assert datetime.fromisoformat(bucket["period_start"]) == hour
+
+
+def test_daily_granularity_rolls_up_hours(client):
+    """Day buckets sum the hourly rows of that day"""
+    place_order(client, [1])
+    place_order(client, [2])
+
+    response = client.get("/analytics/revenue", params={"granularity": "day"})
+
+    [bucket] = response.json()["buckets"]
+    assert bucket["order_count"] == 2
+    assert Decimal(bucket["revenue"]) == Decimal("600.30")
+    assert bucket["period_start"].endswith("T00:00:00Z")
+
+
+def test_range_excludes_other_hours(client):
+    """from/to bound the buckets that are read"""
+    place_order(client, [1])
+
+    response = client.get("/analytics/revenue", params={"to": "2000-01-01T00:00:00Z"})
+
+    assert response.json()["buckets"] == []
+
+
+def test_unknown_granularity_is_rejected(client):
+    response = client.get("/analytics/revenue", params={"granularity": "fortnight"})
+
+    assert response.status_code == 422
+
+
+def test_rebuild_backfills_existing_orders(tmp_path):
+    """The migration fills buckets from orders written before they existed"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'backfill.db'}")
+    order = {
+        "outlet_id": 1, "product_ids": "[1]", "total_price_cents": 10000, "currency": "KES",
+        "is_completed": 0, "placed_at": "2024-03-01T08:15:00+00:00",
+    }
+
+    async def scenario():
+        await database.init_db(engine)
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert(database.Orders.__table__),
+                [{**order, "status": "pending"}, {**order, "status": "cancelled"}],
+            )
+            await conn.run_sync(database.rebuild_revenue_buckets)
+            rows = await conn.exec_driver_sql("SELECT hour, order_count, revenue_cents FROM revenue_hourly")
+            return rows.all()
+
+    try:
+        assert asyncio.run(scenario()) == [("2024-03-01T08", 1, 10000)]
+    finally:
+        asyncio.run(engine.dispose())
+
+
+def test_top_items_per_county(client):
+    """Units are counted per product, repeated ids included, and ranked per county"""
+    place_order(client, [1, 1, 2])
+    place_order(client, [2])
+    place_order(client, [1])
+    cancelled = place_order(client, [2, 2, 2])
+    client.patch(f"/orders/{cancelled['id']}/status", json={"expected_status": "pending", "status": "cancelled"})
+
+    response = client.get("/analytics/top-items", params={"days": 30})
+
+    assert response.status_code == 200
+    [county] = response.json()["counties"]
+    assert county["county"] == "Nairobi"
+    assert [(item["product"], item["units"]) for item in county["items"]] == [("Latte", 3), ("Croissant", 2)]
+    assert Decimal(county["items"][0]["revenue"]) == Decimal("1050.30")
+
+
+def test_top_items_sort_and_limit(client):
+    """Sorting by revenue can reorder products; limit trims each county"""
+    place_order(client, [1])
+    place_order(client, [2, 2])
+
+    response = client.get("/analytics/top-items", params={"sort": "revenue", "limit": 1})
+
+    [county] = response.json()["counties"]
+    assert [item["product"] for item in county["items"]] == ["Croissant"]
+
+
+def test_top_items_for_unknown_county_is_empty(client):
+    place_order(client, [1])
+
+    response = client.get("/analytics/top-items", params={"county": "Mombasa"})
+
+    assert response.json()["counties"] == []
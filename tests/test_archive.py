@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.app import app
+from app.archive import archive_orders
+
+NOW = datetime.now(timezone.utc)
+
+
+def order(order_id, days_ago, status):
+    return {
+        "id": order_id,
+        "outlet_id": 1,
+        "product_ids": "[1]",
+        "total_price_cents": 35000,
+        "currency": "KES",
+        "is_completed": int(status == "completed"),
+        "status": status,
+        "placed_at": (NOW - timedelta(days=days_ago)).isoformat(),
+    }
+
+
+@pytest.fixture
+def sqlite_orders(tmp_path, monkeypatch):
+    """A real SQLite file with old and recent orders for one outlet"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'archive.db'}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+
+    async def seed():
+        await database.init_db(engine)
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert(database.JavaOutletBase.__table__).values(
+                    id=1, name="Java Junction", location="CBD", city="Nairobi", county="Nairobi", is_open=1
+                )
+            )
+            await conn.execute(
+                insert(database.Orders.__table__),
+                [
+                    order(1, 200, "completed"),
+                    order(2, 150, "cancelled"),
+                    order(3, 120, "completed"),
+                    order(4, 100, "pending"),
+                    order(5, 1, "completed"),
+                ],
+            )
+
+    asyncio.run(seed())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def table_ids(engine, table):
+    async def fetch():
+        async with engine.connect() as conn:
+            return sorted((await conn.execute(select(table.c.id))).scalars())
+
+    return asyncio.run(fetch())
+
+
+def test_archive_moves_old_finished_orders_in_batches(sqlite_orders):
+    """Only finished orders past the cutoff move; open and recent ones stay"""
+    moved = asyncio.run(archive_orders(older_than_days=90, batch_size=2))
+
+    assert moved == 3
+    assert table_ids(sqlite_orders, database.Orders.__table__) == [4, 5]
+    assert table_ids(sqlite_orders, database.OrdersArchive.__table__) == [1, 2, 3]
+
+
+def test_history_reads_archive_only_when_range_needs_it(sqlite_orders):
+    """Recent ranges stay on the hot table; older ranges include archived orders"""
+    asyncio.run(archive_orders(older_than_days=90))
+    client = TestClient(app)
+
+    everything = client.get("/outlets/1/orders").json()["orders"]
+    recent = client.get("/outlets/1/orders", params={"from": (NOW - timedelta(days=7)).isoformat()}).json()["orders"]
+
+    assert [row["id"] for row in everything] == [5, 4, 3, 2, 1]
+    assert [row["id"] for row in recent] == [5]
@@ -0,0 +1,83 @@
+import sqlite3
+
+import pytest
+
+from app.cache import VersionedCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """SQLite file with a cache_versions table, as created by init_db"""
+    path = tmp_path / "cache.db"
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE cache_versions (scope TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+    connection.commit()
+    connection.close()
+    return str(path)
+
+
+def bump(path, scope):
+    """Simulate a write committed by another worker"""
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "INSERT INTO cache_versions (scope, version) VALUES (?, 1) "
+        "ON CONFLICT(scope) DO UPDATE SET version = version + 1",
+        (scope,),
+    )
+    connection.commit()
+    connection.close()
+
+
+def test_cache_disabled_until_started():
+    """Lookups miss and puts are ignored before start()"""
+    cache = VersionedCache()
+    cache.put("outlets", "list", [1, 2], 0)
+
+    assert cache.lookup("outlets", "list") == (None, None)
+
+
+def test_cache_hit_until_other_worker_writes(db_path):
+    """A commit from another connection invalidates only the bumped scope"""
+    cache = VersionedCache()
+    cache.start(db_path)
+
+    version, value = cache.lookup("outlets", "list")
+    assert value is None
+    cache.put("outlets", "list", ["Karen"], version)
+    version, value = cache.lookup("menu_items", 1)
+    cache.put("menu_items", 1, ["Latte"], version)
+
+    assert cache.lookup("outlets", "list")[1] == ["Karen"]
+
+    bump(db_path, "outlets")
+
+    assert cache.lookup("outlets", "list")[1] is None
+    assert cache.lookup("menu_items", 1)[1] == ["Latte"]
+    cache.stop()
+
+
+def test_cache_entry_loaded_during_write_is_not_served(db_path):
+    """A value tagged with the pre-write version is dropped on the next lookup"""
+    cache = VersionedCache()
+    cache.start(db_path)
+
+    version, _ = cache.lookup("outlets", "list")
+    bump(db_path, "outlets")
+    cache.put("outlets", "list", ["stale"], version)
+
+    assert cache.lookup("outlets", "list")[1] is None
+    cache.stop()
+
+
+def test_cache_evicts_least_recently_used(db_path):
+    """The cache never holds more than max_entries values"""
+    cache = VersionedCache(max_entries=2)
+    cache.start(db_path)
+
+    for key in range(3):
+        version, _ = cache.lookup("outlets", key)
+        cache.put("outlets", key, key, version)
+
+    assert cache.lookup("outlets", 0)[1] is None
+    assert cache.lookup("outlets", 2)[1] == 2
+    cache.stop()
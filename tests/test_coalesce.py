@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.coalesce import SingleFlight, statement_key
+from app.database import JavaOutletBase
+from app.metrics import metrics
+
+
+def test_concurrent_identical_reads_share_one_call():
+    """Callers that arrive while a read is in flight get its result"""
+    flight = SingleFlight()
+    calls = []
+
+    async def read():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("outlet:1", read) for _ in range(5)))
+
+    before = metrics.get("reads_coalesced")
+    results = asyncio.run(scenario())
+
+    assert results == [{"id": 1}] * 5
+    assert len(calls) == 1
+    assert metrics.get("reads_coalesced") - before == 4
+    assert flight.in_flight() == 0
+
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    """A failed read fails its followers too, and the next caller retries"""
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database is locked")
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.run("k", failing) for _ in range(3)), return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await flight.run("k", failing)
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 2
+
+
+def test_leader_cancellation_does_not_cancel_followers():
+    """A disconnecting first caller leaves the shared read running"""
+    flight = SingleFlight()
+
+    async def read():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.run("k", read))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.run("k", read))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_statement_key_distinguishes_parameters():
+    """Same SQL with different bound values is a different read"""
+    table = JavaOutletBase.__table__
+
+    def by_id(outlet_id):
+        return select(table.c.name).where(table.c.id == outlet_id)
+
+    assert statement_key(by_id(1)) == statement_key(by_id(1))
+    assert statement_key(by_id(1)) != statement_key(by_id(2))
@@ -0,0 +1,101 @@
+import gzip
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.app import app
+from app.compression import EncodedBody, accepts_gzip
+
+
+def make_outlets(count):
+    return [
+        {
+            "id": outlet_id,
+            "name": f"Branch {outlet_id}",
+            "location": "Westlands",
+            "city": "Nairobi",
+            "county": "Nairobi",
+            "street_address": "Waiyaki Way",
+            "phone_number": "+254700000000",
+            "rating": 4.5,
+            "is_open": 1,
+            "opening_time": "06:00",
+            "closing_time": "20:00",
+            "last_inspected_at": "2024-01-01T00:00:00",
+        }
+        for outlet_id in range(count)
+    ]
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate", True),
+        ("br;q=1.0, gzip;q=0.5", True),
+        ("gzip;q=0", False),
+        ("*", True),
+        ("*;q=0, gzip", True),
+        ("gzip;q=0, *", False),
+        ("identity", False),
+        ("", False),
+    ],
+)
+def test_accepts_gzip(header, expected):
+    """Accept-Encoding negotiation honours q-values"""
+    request = MagicMock()
+    request.headers = {"accept-encoding": header}
+
+    assert accepts_gzip(request) is expected
+
+
+def test_encoded_body_compresses_once():
+    """The gzip encoding is computed on first use and then reused"""
+    body = EncodedBody(b'{"outlets": []}' * 200)
+
+    with patch("app.compression.gzip.compress", wraps=gzip.compress) as compress:
+        first = body.gzip
+        second = body.gzip
+
+    assert first is second
+    assert compress.call_count == 1
+    assert gzip.decompress(first) == body.content
+
+
+def test_list_outlets_gzip_when_accepted():
+    """Large outlet lists are gzipped for clients that accept it"""
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        mock_db.return_value = make_outlets(20)
+
+        client = TestClient(app)
+        response = client.get("/outlets/", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert len(response.json()["outlets"]) == 20
+
+
+def test_list_outlets_identity_when_not_accepted():
+    """Clients without gzip support get the plain JSON body"""
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        mock_db.return_value = make_outlets(20)
+
+        client = TestClient(app)
+        response = client.get("/outlets/", headers={"Accept-Encoding": "identity"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert len(response.json()["outlets"]) == 20
+
+
+def test_list_outlets_small_body_not_compressed():
+    """Bodies under the size threshold are sent uncompressed"""
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        mock_db.return_value = make_outlets(1)
+
+        client = TestClient(app)
+        response = client.get("/outlets/", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import config, database
+from app.app import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A real SQLite file with one outlet, a menu item and one open order"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dashboard.db'}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+    asyncio.run(database.init_db(engine))
+    client = TestClient(app)
+    client.post("/outlets/", json={
+        "name": "Java Junction", "location": "CBD", "city": "Nairobi", "county": "Nairobi", "is_open": True,
+    })
+    client.post("/menu-items/", json={
+        "outlet_id": 1, "menu_item_name": "Latte", "price": "350.10", "currency": "KES",
+        "is_available": True, "has_dairy": True, "is_seasonal": False,
+    })
+    client.post("/orders/", json={"outlet_id": 1, "product_ids": [1, 1]})
+    yield client
+    asyncio.run(engine.dispose())
+
+
+def test_dashboard_combines_every_section(client):
+    response = client.get("/outlets/1/dashboard")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["outlet"]["name"] == "Java Junction"
+    assert [item["menu_item_name"] for item in body["menu_items"]] == ["Latte"]
+    assert body["order_summary"]["total_orders"] == 1
+    assert body["order_summary"]["total_revenue"] == "700.20"
+    assert len(body["queue"]) == 1
+    assert {section["status"] for section in body["sections"].values()} == {"ok"}
+    assert body["latency_ms"] == max(section["latency_ms"] for section in body["sections"].values())
+    assert "total;dur=" in response.headers["server-timing"]
+
+
+def test_slow_section_times_out_alone(client, monkeypatch):
+    """A section stuck in SQLite is interrupted at its timeout; the rest still arrive"""
+    slow = text(
+        "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n LIMIT 1000000000) SELECT count(*) FROM n"
+    )
+    monkeypatch.setattr("app.app.revenue_query", lambda *args: slow)
+    monkeypatch.setattr(config, "DASHBOARD_SECTION_TIMEOUT_SECONDS", 0.2)
+
+    body = client.get("/outlets/1/dashboard").json()
+
+    assert body["sections"]["order_summary"]["status"] == "timeout"
+    assert body["order_summary"] is None
+    assert body["outlet"]["name"] == "Java Junction"
+    assert len(body["queue"]) == 1
+    assert body["sections"]["order_summary"]["latency_ms"] < 2000
+
+
+def test_failing_section_reports_error(client, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("no such table: revenue_hourly")
+
+    monkeypatch.setattr("app.app.revenue_query", broken)
+
+    body = client.get("/outlets/1/dashboard").json()
+
+    assert body["sections"]["order_summary"] == {
+        "status": "error", "latency_ms": body["sections"]["order_summary"]["latency_ms"],
+        "detail": "no such table: revenue_hourly",
+    }
+    assert body["menu_items"] is not None
+
+
+def test_unknown_outlet_is_404(client):
+    assert client.get("/outlets/99/dashboard").status_code == 404
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import config, database, deadlines
+from app.app import app
+from app.deadlines import DeadlineExceeded, deadline_seconds, request_deadline
+from app.metrics import metrics
+
+SLOW_QUERY = text(
+    "WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter) "
+    "SELECT count(*) FROM counter WHERE x < 0"
+)
+
+
+@pytest.fixture
+def temp_sessions(tmp_path, monkeypatch):
+    """Point run_db_operation at a throwaway SQLite file with a single pooled connection"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'deadline.db'}", pool_size=1, max_overflow=0)
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+    yield
+    asyncio.run(engine.dispose())
+
+
+def test_deadline_interrupts_running_statement(temp_sessions):
+    """A statement still running at the deadline is interrupted and the connection reused"""
+    async def slow(session):
+        return (await session.execute(SLOW_QUERY)).scalar()
+
+    async def fast(session):
+        return (await session.execute(text("SELECT 1"))).scalar()
+
+    async def scenario():
+        interrupted = metrics.get("db_statements_interrupted")
+        started = time.monotonic()
+        with request_deadline(0.2):
+            with pytest.raises(DeadlineExceeded):
+                await database.run_db_operation(slow)
+        assert time.monotonic() - started < 2
+        assert metrics.get("db_statements_interrupted") == interrupted + 1
+        # The only pooled connection is usable again straight away
+        assert await database.run_db_operation(fast) == 1
+
+    asyncio.run(scenario())
+
+
+def test_expired_deadline_skips_database(temp_sessions):
+    """No session is opened once the deadline has already passed"""
+    operation = AsyncMock()
+
+    async def scenario():
+        with request_deadline(0):
+            with pytest.raises(DeadlineExceeded):
+                await database.run_db_operation(operation)
+
+    asyncio.run(scenario())
+    assert not operation.called
+
+
+def test_deadline_header_can_only_shorten_route_default():
+    """The header tightens the route deadline but never extends it"""
+    route_default = config.ROUTE_DEADLINES["GET /outlets/{outlet_id}/queue"]
+    assert deadline_seconds("GET /outlets/{outlet_id}/queue", None) == route_default
+    assert deadline_seconds("GET /unknown", None) == config.REQUEST_DEADLINE_SECONDS
+    assert deadline_seconds("GET /outlets/{outlet_id}/queue", "250") == 0.25
+    assert deadline_seconds("GET /outlets/{outlet_id}/queue", "20000") == route_default
+    assert deadline_seconds(None, "soon") == config.REQUEST_DEADLINE_SECONDS
+
+
+def test_deadline_exceeded_returns_504_and_is_counted():
+    """Handlers surface a passed deadline as 504 and the cancellation is counted"""
+    async def deadline_passes(operation):
+        raise deadlines.exceeded()
+
+    client = TestClient(app)
+    before = client.get("/metrics").json().get("requests_deadline_exceeded", 0)
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        mock_db.side_effect = deadline_passes
+
+        response = client.get("/outlets/1/")
+
+    assert response.status_code == 504
+    assert client.get("/metrics").json()["requests_deadline_exceeded"] == before + 1
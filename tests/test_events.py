@@ -0,0 +1,125 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from app import config
+from app.app import app
+from app.events import OrderEventHub, order_events
+
+
+def test_subscriber_receives_events_for_its_outlet():
+    """Events are only delivered to subscribers of the same outlet"""
+    async def scenario():
+        hub = OrderEventHub()
+        karen = hub.subscribe(1)
+        westlands = hub.subscribe(2)
+
+        hub.publish(1, "order.created", {"id": 10})
+
+        event = await karen.next_event(timeout=1)
+        assert event.data == {"id": 10}
+        assert await westlands.next_event(timeout=0.01) is None
+
+    asyncio.run(scenario())
+
+
+def test_resume_from_last_event_id():
+    """Reconnecting subscribers replay buffered events after their last id"""
+    async def scenario():
+        hub = OrderEventHub()
+        first = hub.publish(1, "order.created", {"id": 10})
+        hub.publish(2, "order.created", {"id": 11})
+        hub.publish(1, "order.status", {"id": 10, "status": "preparing"})
+
+        subscription = hub.subscribe(1, last_event_id=first.id)
+
+        event = await subscription.next_event(timeout=1)
+        assert event.type == "order.status"
+        assert subscription.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_slow_consumer_is_dropped():
+    """A full subscriber queue drops that subscriber without blocking the publisher"""
+    async def scenario():
+        hub = OrderEventHub()
+        slow = hub.subscribe(1)
+        for order_id in range(slow.queue.maxsize + 1):
+            hub.publish(1, "order.created", {"id": order_id})
+
+        assert slow.dropped
+        assert hub.subscriber_count(1) == 0
+        assert hub.dropped_subscribers == 1
+        # Already queued events can still be drained before the stream ends
+        assert not slow.finished
+        while not slow.queue.empty():
+            slow.queue.get_nowait()
+        assert slow.finished
+
+    asyncio.run(scenario())
+
+
+def test_status_change_is_published_to_websocket_feed():
+    """A status update reaches the outlet's WebSocket feed"""
+    order = {
+        "id": 7,
+        "outlet_id": 42,
+        "product_ids": "[1]",
+        "total_price_cents": 35000,
+        "currency": "KES",
+        "is_completed": 0,
+        "status": "preparing",
+        "placed_at": "2024-01-01T08:00:00+00:00",
+        "completed_at": None,
+        "payment_method": None,
+        "notes": None,
+    }
+    client = TestClient(app)
+    last_event_id = order_events.publish(0, "order.created", {}).id
+
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        mock_db.return_value = (True, order)
+        response = client.patch("/orders/7/status", json={"expected_status": "pending", "status": "preparing"})
+        assert response.status_code == 200
+
+    with client.websocket_connect(f"/outlets/42/orders/ws?last_event_id={last_event_id}") as websocket:
+        event = websocket.receive_json()
+
+    assert event["type"] == "order.status"
+    assert event["data"]["status"] == "preparing"
+
+
+def test_resume_id_from_another_worker_resets_feed():
+    """A Last-Event-ID this hub did not issue is not compared against its counter"""
+    async def scenario():
+        other_worker = OrderEventHub()
+        hub = OrderEventHub()
+        hub.publish(1, "order.created", {"id": 10})
+        stale = other_worker.publish(1, "order.created", {"id": 99})
+
+        subscription = hub.subscribe(1, last_event_id=stale.id)
+
+        event = await subscription.next_event(timeout=1)
+        assert event.type == "feed.reset"
+        assert subscription.queue.empty()
+
+    asyncio.run(scenario())
+
+
+def test_replay_overflow_counts_dropped_subscriber():
+    """A resume too far behind to replay is dropped and counted"""
+    async def scenario():
+        hub = OrderEventHub()
+        first = hub.publish(1, "order.created", {"id": 0})
+        for order_id in range(config.EVENT_QUEUE_SIZE + 1):
+            hub.publish(1, "order.created", {"id": order_id})
+
+        subscription = hub.subscribe(1, last_event_id=first.id)
+
+        assert subscription.dropped
+        assert hub.dropped_subscribers == 1
+        assert hub.subscriber_count(1) == 0
+
+    asyncio.run(scenario())
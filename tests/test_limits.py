@@ -0,0 +1,91 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config
+from app.app import app
+from app.limits import RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the FASTAPI app."""
+    return TestClient(app)
+
+
+def test_token_bucket_refills_over_time(monkeypatch):
+    """Spent tokens come back at the refill rate"""
+    now = [100.0]
+    monkeypatch.setattr("app.limits.time.monotonic", lambda: now[0])
+    bucket = TokenBucket(capacity=2, refill_per_second=1)
+
+    assert bucket.take(2) == 0
+    assert bucket.take(1) == pytest.approx(1.0)
+    now[0] += 1
+    assert bucket.take(1) == 0
+
+
+def test_rate_limiter_isolates_clients():
+    """One client's exhausted bucket does not affect another client"""
+    limiter = RateLimiter(capacity=1, refill_per_second=0.001)
+
+    assert limiter.take("ip:1.1.1.1", 1) == 0
+    assert limiter.take("ip:1.1.1.1", 1) > 0
+    assert limiter.take("ip:2.2.2.2", 1) == 0
+
+
+def test_rate_limited_request_gets_429(client, monkeypatch):
+    """Clients over their budget get 429 with Retry-After"""
+    monkeypatch.setattr("app.limits.rate_limiter", RateLimiter(capacity=5, refill_per_second=0.5))
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        mock_db.return_value = []
+
+        # GET /outlets/ costs 5 tokens, so the second call is over budget
+        assert client.get("/outlets/").status_code == 200
+        response = client.get("/outlets/")
+
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+        assert mock_db.call_count == 1
+
+
+def test_api_keys_have_separate_buckets(client, monkeypatch):
+    """Requests carrying a configured API key are limited per key"""
+    monkeypatch.setattr("app.limits.rate_limiter", RateLimiter(capacity=5, refill_per_second=0.5))
+    monkeypatch.setattr(config, "API_KEYS", frozenset({"pos-1", "pos-2"}))
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        mock_db.return_value = []
+
+        assert client.get("/outlets/", headers={"X-API-Key": "pos-1"}).status_code == 200
+        assert client.get("/outlets/", headers={"X-API-Key": "pos-2"}).status_code == 200
+        assert client.get("/outlets/", headers={"X-API-Key": "pos-1"}).status_code == 429
+
+
+def test_unknown_api_keys_share_the_address_bucket(client, monkeypatch):
+    """Rotating unconfigured keys does not buy a fresh bucket"""
+    monkeypatch.setattr("app.limits.rate_limiter", RateLimiter(capacity=5, refill_per_second=0.5))
+    monkeypatch.setattr(config, "API_KEYS", frozenset({"pos-1"}))
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        mock_db.return_value = []
+
+        assert client.get("/outlets/", headers={"X-API-Key": "made-up-1"}).status_code == 200
+        assert client.get("/outlets/", headers={"X-API-Key": "made-up-2"}).status_code == 429
+
+
+def test_load_shedding_returns_503(client, monkeypatch):
+    """Requests are shed while too many DB operations are in flight"""
+    monkeypatch.setattr("app.limits.in_flight_operations", lambda: config.DB_WORKER_MAX_IN_FLIGHT)
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        response = client.get("/outlets/1/")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == str(config.LOAD_SHED_RETRY_AFTER_SECONDS)
+        assert not mock_db.called
+
+
+def test_health_endpoints_are_not_shed(client, monkeypatch):
+    """Health checks keep answering under load"""
+    monkeypatch.setattr("app.limits.in_flight_operations", lambda: config.DB_WORKER_MAX_IN_FLIGHT)
+
+    assert client.get("/health/startup").status_code == 200
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import config, database
+from app.app import app
+from app.maintenance import MaintenanceJob, MaintenanceScheduler
+
+
+@pytest.fixture
+def temp_engine(tmp_path, monkeypatch):
+    """Point maintenance at a throwaway SQLite file with the app schema"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'maintenance.db'}")
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+    asyncio.run(database.init_db(engine))
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def test_default_jobs_run_and_record_status(temp_engine):
+    """Every job runs against a real file and reports status and duration"""
+    scheduler = MaintenanceScheduler()
+
+    async def scenario():
+        for job in scheduler.jobs:
+            await scheduler.run_job(job)
+
+    asyncio.run(scenario())
+    status = scheduler.status()
+
+    assert set(status) == {"wal_checkpoint", "optimize", "incremental_vacuum", "archive_orders"}
+    for job in status.values():
+        assert job["last_status"] == "ok"
+        assert job["last_duration_seconds"] >= 0
+        assert job["last_run_at"] is not None
+
+
+def test_failing_job_records_error(temp_engine):
+    """A broken statement is reported instead of stopping the scheduler"""
+    job = MaintenanceJob("broken", ("PRAGMA definitely_not_a_pragma(",), 60)
+
+    asyncio.run(MaintenanceScheduler([job]).run_job(job))
+
+    assert job.last_status.startswith("error")
+
+
+def test_due_job_is_deferred_while_requests_use_the_database(temp_engine, monkeypatch):
+    """Foreground DB work keeps maintenance from running"""
+    monkeypatch.setattr(config, "MAINTENANCE_TICK_SECONDS", 0.01)
+    monkeypatch.setattr(config, "MAINTENANCE_IDLE_WAIT_SECONDS", 0.05)
+    monkeypatch.setattr(database, "in_flight_operations", lambda: 1)
+    job = MaintenanceJob("wal_checkpoint", ("PRAGMA wal_checkpoint(TRUNCATE)",), 0)
+    scheduler = MaintenanceScheduler([job])
+
+    async def scenario():
+        scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+    assert job.last_status == "deferred"
+    assert job.last_run_at is None
+
+
+def test_maintenance_status_endpoint():
+    """The worker's job status is exposed next to the other health endpoints"""
+    response = TestClient(app).get("/health/maintenance")
+
+    assert response.status_code == 200
+    assert "wal_checkpoint" in response.json()
@@ -0,0 +1,96 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.app import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client backed by a real SQLite file with two outlets selling the same items"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'menu.db'}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+
+    async def seed():
+        await database.init_db(engine)
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert(database.JavaOutletBase.__table__),
+                [
+                    {"id": outlet_id, "name": name, "location": name, "city": "Nairobi", "county": "Nairobi", "is_open": 1}
+                    for outlet_id, name in ((1, "Karen"), (2, "Westlands"))
+                ],
+            )
+
+    asyncio.run(seed())
+    client = TestClient(app)
+    for outlet_id in (1, 2):
+        for name, sku, category, price in (
+            ("Latte", "LAT-01", "coffee", "350.10"),
+            ("Croissant", "CRO-01", "bakery", "250.00"),
+        ):
+            response = client.post(
+                "/menu-items/",
+                json={
+                    "outlet_id": outlet_id, "menu_item_name": name, "sku": sku,
+                    "category": category, "price": price, "is_available": True,
+                },
+            )
+            assert response.status_code == 201
+    yield client
+    asyncio.run(engine.dispose())
+
+
+def menu(client, outlet_id):
+    return {item["sku"]: item for item in client.get(f"/outlets/{outlet_id}/menu/").json()["menu_items"]}
+
+
+def test_percentage_change_across_outlets(client):
+    """One statement reprices every matching item and rounds to the cent"""
+    response = client.patch(
+        "/menu-items/bulk", json={"filter": {"sku": "LAT-01"}, "price_change_percent": "10"}
+    )
+
+    assert response.json() == {"updated": 2}
+    for outlet_id in (1, 2):
+        items = menu(client, outlet_id)
+        assert Decimal(items["LAT-01"]["price"]) == Decimal("385.11")
+        assert Decimal(items["CRO-01"]["price"]) == Decimal("250.00")
+
+
+def test_sold_out_for_selected_outlets(client):
+    """Availability changes respect every filter field"""
+    response = client.patch(
+        "/menu-items/bulk",
+        json={"filter": {"category": "bakery", "outlet_ids": [2]}, "is_available": False},
+    )
+
+    assert response.json() == {"updated": 1}
+    assert menu(client, 1)["CRO-01"]["is_available"] is True
+    assert menu(client, 2)["CRO-01"]["is_available"] is False
+
+
+def test_set_price(client):
+    response = client.patch("/menu-items/bulk", json={"filter": {"outlet_ids": [1]}, "set_price": "300.00"})
+
+    assert response.json() == {"updated": 2}
+    assert {Decimal(item["price"]) for item in menu(client, 1).values()} == {Decimal("300.00")}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"filter": {}, "is_available": False},
+        {"filter": {"sku": "LAT-01"}},
+        {"filter": {"sku": "LAT-01"}, "set_price": "300", "price_change_percent": "5"},
+        {"filter": {"sku": "LAT-01"}, "price_change_percent": "-100"},
+    ],
+)
+def test_invalid_bulk_updates_are_rejected(client, body):
+    """Unfiltered, empty and contradictory updates never reach the database"""
+    assert client.patch("/menu-items/bulk", json=body).status_code == 422
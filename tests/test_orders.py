@@ -0,0 +1,211 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from unittest.mock import patch, AsyncMock
+
+from app import database
+from app.app import OPEN_ORDERS, app, orders_table
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the FASTAPI app."""
+    return TestClient(app)
+
+
+def order_row(**overrides):
+    row = {
+        "id": 7,
+        "outlet_id": 1,
+        "product_ids": "[1, 1, 2]",
+        "total_price_cents": 90050,
+        "currency": "KES",
+        "is_completed": 0,
+        "status": "pending",
+        "placed_at": "2024-01-01T08:00:00+00:00",
+        "completed_at": None,
+        "payment_method": "mpesa",
+        "notes": None,
+    }
+    row.update(overrides)
+    return row
+
+
+class TestOrderStatus:
+    """Test suite for PATCH /orders/{order_id}/status"""
+
+    def test_update_status_success(self, client):
+        """The order moves on when it is still in the expected status"""
+        with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+            mock_db.return_value = (True, order_row(status="preparing"))
+
+            response = client.patch(
+                "/orders/7/status", json={"expected_status": "pending", "status": "preparing"}
+            )
+
+            assert response.status_code == 200
+            assert response.json()["status"] == "preparing"
+            assert response.json()["product_ids"] == [1, 1, 2]
+
+    def test_update_status_conflict(self, client):
+        """A stale expected_status loses the compare-and-set with 409"""
+        with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+            mock_db.return_value = (False, order_row(status="ready"))
+
+            response = client.patch(
+                "/orders/7/status", json={"expected_status": "pending", "status": "preparing"}
+            )
+
+            assert response.status_code == 409
+            assert "ready" in response.json()["detail"]
+
+    def test_update_status_not_found(self, client):
+        """Unknown order ids return 404"""
+        with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+            mock_db.return_value = (False, None)
+
+            response = client.patch(
+                "/orders/999/status", json={"expected_status": "pending", "status": "preparing"}
+            )
+
+            assert response.status_code == 404
+
+    def test_update_status_invalid_transition(self, client):
+        """Skipping lifecycle steps is rejected before touching the database"""
+        with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+            response = client.patch(
+                "/orders/7/status", json={"expected_status": "pending", "status": "completed"}
+            )
+
+            assert response.status_code == 422
+            assert not mock_db.called
+
+    def test_update_status_unknown_status(self, client):
+        """Statuses outside the lifecycle fail validation"""
+        response = client.patch(
+            "/orders/7/status", json={"expected_status": "pending", "status": "brewing"}
+        )
+
+        assert response.status_code == 422
+
+
+class TestOutletQueue:
+    """Test suite for GET /outlets/{outlet_id}/queue"""
+
+    def test_queue_lists_open_orders(self, client):
+        """Open orders are returned oldest first as provided by the query"""
+        with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+            mock_db.return_value = [
+                order_row(id=1, placed_at="2024-01-01T08:00:00+00:00"),
+                order_row(id=2, status="preparing", placed_at="2024-01-01T08:05:00+00:00"),
+            ]
+
+            response = client.get("/outlets/1/queue")
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["outlet_id"] == 1
+            assert [order["id"] for order in data["orders"]] == [1, 2]
+
+    def test_queue_empty(self, client):
+        """An outlet without open orders has an empty queue"""
+        with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+            mock_db.return_value = []
+
+            response = client.get("/outlets/1/queue")
+
+            assert response.status_code == 200
+            assert response.json()["orders"] == []
+
+
+class TestCreateOrder:
+    """Test suite for POST /orders/"""
+
+    def test_create_order(self, client):
+        """A placed order starts pending"""
+        with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+            mock_db.return_value = order_row()
+
+            response = client.post("/orders/", json={"outlet_id": 1, "product_ids": [1, 1, 2]})
+
+            assert response.status_code == 201
+            assert response.json()["status"] == "pending"
+
+    def test_create_order_without_products(self, client):
+        """Empty orders are rejected"""
+        response = client.post("/orders/", json={"outlet_id": 1, "product_ids": []})
+
+        assert response.status_code == 422
+
+
+@pytest.fixture
+def sqlite_orders(tmp_path, monkeypatch):
+    """A real SQLite file with one outlet and one pending order"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'orders.db'}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+
+    async def seed():
+        await database.init_db(engine)
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert(database.JavaOutletBase.__table__).values(
+                    id=1, name="Java Junction", location="CBD", city="Nairobi", county="Nairobi", is_open=1
+                )
+            )
+            await conn.execute(insert(database.Orders.__table__).values(**order_row(id=7)))
+
+    asyncio.run(seed())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+class TestOrdersOnSQLite:
+    """Compare-and-set and the queue index against a real database"""
+
+    def test_concurrent_status_updates_have_one_winner(self, sqlite_orders):
+        """Two tablets moving the same order at once: one 200, one 409"""
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(
+                    client.patch("/orders/7/status", json={"expected_status": "pending", "status": "preparing"}),
+                    client.patch("/orders/7/status", json={"expected_status": "pending", "status": "cancelled"}),
+                )
+
+        responses = asyncio.run(scenario())
+
+        assert sorted(response.status_code for response in responses) == [200, 409]
+
+    def test_cancelled_order_is_not_completed(self, sqlite_orders):
+        """Cancelling leaves is_completed and completed_at unset and empties the queue"""
+        client = TestClient(app)
+        response = client.patch("/orders/7/status", json={"expected_status": "pending", "status": "cancelled"})
+
+        assert response.status_code == 200
+        assert response.json()["is_completed"] == 0
+        assert response.json()["completed_at"] is None
+        assert client.get("/outlets/1/queue").json()["orders"] == []
+
+    def test_queue_query_uses_partial_index(self, sqlite_orders):
+        """The queue statement is answered from ix_orders_queue, not a table scan"""
+        statement = (
+            select(orders_table)
+            .where(orders_table.c.outlet_id == 1, OPEN_ORDERS)
+            .order_by(orders_table.c.placed_at)
+            .limit(100)
+        )
+        compiled = statement.compile(dialect=sqlite_orders.dialect, compile_kwargs={"literal_binds": True})
+
+        async def query_plan():
+            async with sqlite_orders.connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+                return " ".join(row[-1] for row in result)
+
+        plan = asyncio.run(query_plan())
+
+        assert "USING INDEX ix_orders_queue" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.app import app
+
+
+def outlet(name, **overrides):
+    return {"name": name, "location": name, "city": "Nairobi", "county": "Nairobi", "is_open": 1, **overrides}
+
+
+@pytest.fixture
+def changes_db(tmp_path, monkeypatch):
+    """A real SQLite file with the change tracking triggers installed"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'changes.db'}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+    asyncio.run(database.init_db(engine))
+
+    def execute(sql):
+        async def run():
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql(sql)
+
+        asyncio.run(run())
+
+    yield TestClient(app), execute
+    asyncio.run(engine.dispose())
+
+
+def test_changes_since_returns_only_changed_rows(changes_db):
+    """After a full sync, only the outlet that changed is returned"""
+    client, _ = changes_db
+    client.put("/outlets/sync", json=[outlet("Karen"), outlet("Westlands"), outlet("CBD")])
+    full = client.get("/outlets/changes").json()
+    assert len(full["outlets"]) == 3
+    assert full["has_more"] is False
+
+    client.put("/outlets/sync", json=[outlet("Karen"), outlet("Westlands", is_open=0), outlet("CBD")])
+    delta = client.get("/outlets/changes", params={"since": full["next_since"]}).json()
+
+    assert [row["name"] for row in delta["outlets"]] == ["Westlands"]
+    assert delta["outlets"][0]["is_open"] is False
+    assert delta["next_since"] > full["next_since"]
+    assert client.get("/outlets/changes", params={"since": delta["next_since"]}).json()["outlets"] == []
+
+
+def test_menu_items_and_deletions_are_tracked(changes_db):
+    """A menu item created and then deleted since the sync point only shows as a tombstone"""
+    client, execute = changes_db
+    client.put("/outlets/sync", json=[outlet("Karen")])
+    since = client.get("/outlets/changes").json()["next_since"]
+    client.post("/menu-items/", json={"outlet_id": 1, "menu_item_name": "Latte", "price": "350", "is_available": True})
+    execute("DELETE FROM menu_items WHERE id = 1")
+
+    delta = client.get("/outlets/changes", params={"since": since}).json()
+
+    assert delta["menu_items"] == []
+    assert [(row["entity"], row["id"]) for row in delta["deleted"]] == [("menu_items", 1)]
+
+
+def test_paging_does_not_skip_rows(changes_db):
+    """Small pages across outlets and menu items add up to every change"""
+    client, _ = changes_db
+    client.put("/outlets/sync", json=[outlet(f"Outlet {number}") for number in range(5)])
+    for outlet_id in (1, 2, 3):
+        client.post(
+            "/menu-items/", json={"outlet_id": outlet_id, "menu_item_name": "Latte", "price": "350", "is_available": True}
+        )
+
+    seen_outlets, seen_items, since, pages = set(), set(), 0, 0
+    while True:
+        page = client.get("/outlets/changes", params={"since": since, "limit": 2}).json()
+        seen_outlets.update(row["id"] for row in page["outlets"])
+        seen_items.update(row["id"] for row in page["menu_items"])
+        since, pages = page["next_since"], pages + 1
+        if not page["has_more"]:
+            break
+
+    assert seen_outlets == {1, 2, 3, 4, 5}
+    assert seen_items == {1, 2, 3}
+    assert pages >= 4
+
+
+def test_existing_rows_are_backfilled_with_distinct_sequences(tmp_path):
+    """Rows written before tracking existed get their own sequence numbers"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+
+    async def scenario():
+        await database.init_db(engine)
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("DROP TRIGGER trg_java_outlets_change_insert")
+            for name in ("Karen", "Westlands"):
+                await conn.exec_driver_sql(
+                    f"INSERT INTO java_outlets (name, location, city, county, is_open) "
+                    f"VALUES ('{name}', '{name}', 'Nairobi', 'Nairobi', 1)"
+                )
+            await conn.run_sync(database.create_change_tracking_triggers)
+            rows = await conn.exec_driver_sql("SELECT change_seq FROM java_outlets ORDER BY id")
+            return [row[0] for row in rows]
+
+    try:
+        assert asyncio.run(scenario()) == [1, 2]
+    finally:
+        asyncio.run(engine.dispose())
@@ -96,3 +96,108 @@ def test_java_outlets_db_error():
         assert isinstance(data["detail"], str) 
         assert len(data["detail"]) > 0
         
+
+
+def test_list_java_outlets_fields_projection():
+    """test ?fields= returns only the requested outlet fields"""
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        mock_db.return_value = [
+            {"id": 1, "name": "Karen Branch", "is_open": 1},
+            {"id": 2, "name": "Westlands Branch", "is_open": 0},
+        ]
+        
+        client = TestClient(app)
+        response = client.get("/outlets/", params={"fields": "id, name,is_open"})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["outlets"] == [
+            {"id": 1, "name": "Karen Branch", "is_open": True},
+            {"id": 2, "name": "Westlands Branch", "is_open": False},
+        ]
+        
+        
+def test_list_java_outlets_unknown_field():
+    """test ?fields= with a column that is not part of JavaOutlet"""
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        client = TestClient(app)
+        response = client.get("/outlets/", params={"fields": "id,password"})
+        
+        assert response.status_code == 422
+        assert "password" in response.json()["detail"]
+        assert not mock_db.called
+        
+        
+def test_list_java_outlets_fields_selects_only_requested_columns():
+    """test ?fields= projects the SELECT itself, not just the response"""
+    statements = []
+    
+    class RecordingSession:
+        async def execute(self, statement):
+            statements.append(statement)
+            result = MagicMock()
+            result.mappings.return_value.all.return_value = [{"id": 1, "name": "Karen Branch"}]
+            return result
+    
+    async def run_against_recording_session(operation, commit=False):
+        return await operation(RecordingSession())
+    
+    with patch("app.app.run_db_operation", side_effect=run_against_recording_session):
+        client = TestClient(app)
+        response = client.get("/outlets/", params={"fields": "id,name"})
+        
+    assert response.status_code == 200
+    assert [column.name for column in statements[0].selected_columns] == ["id", "name"]
+    assert response.json() == {"outlets": [{"id": 1, "name": "Karen Branch"}]}
+
+
+def test_openapi_documents_projected_outlets():
+    """test the OpenAPI schema allows the partial shape returned for ?fields="""
+    client = TestClient(app)
+    schema = client.get("/openapi.json").json()
+    
+    list_schema = schema["paths"]["/outlets/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    refs = [option["$ref"].rsplit("/", 1)[-1] for option in list_schema["anyOf"]]
+    assert refs == ["JavaOutletList", "JavaOutletPartialList", "JavaOutletBatch"]
+
+
+def test_batch_lookup_keeps_request_order_and_marks_missing():
+    """test ?ids= resolves every id in one IN query and returns them in request order"""
+    statements = []
+    rows = [
+        {"id": 1, "name": "Karen Branch", "is_open": 1},
+        {"id": 3, "name": "CBD branch", "is_open": 1},
+    ]
+
+    class RecordingSession:
+        async def execute(self, statement):
+            statements.append(statement)
+            result = MagicMock()
+            result.mappings.return_value.all.return_value = rows
+            return result
+
+    async def run_against_recording_session(operation, commit=False):
+        return await operation(RecordingSession())
+
+    with patch("app.app.run_db_operation", side_effect=run_against_recording_session) as mock_db:
+        client = TestClient(app)
+        response = client.get("/outlets/", params={"ids": "3,2,1,3", "fields": "name"})
+
+    assert response.status_code == 200
+    assert mock_db.call_count == 1
+    assert len(statements) == 1
+    assert sorted(statements[0].compile().params["id_1"]) == [1, 2, 3]
+    assert response.json() == {
+        "outlets": [{"name": "CBD branch"}, None, {"name": "Karen Branch"}, {"name": "CBD branch"}],
+        "missing": [2],
+    }
+
+
+def test_batch_lookup_rejects_bad_ids():
+    """test ?ids= must be a bounded list of integers"""
+    with patch("app.app.run_db_operation", new_callable=AsyncMock) as mock_db:
+        client = TestClient(app)
+
+        assert client.get("/outlets/", params={"ids": "1,two"}).status_code == 422
+        assert client.get("/outlets/", params={"ids": ",".join(["1"] * 101)}).status_code == 422
+        assert not mock_db.called
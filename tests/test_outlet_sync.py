@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.app import app
+
+
+def outlet(name, city="Nairobi", **overrides):
+    return {"name": name, "location": name, "city": city, "county": city, "is_open": 1, **overrides}
+
+
+@pytest.fixture
+def sync_db(tmp_path, monkeypatch):
+    """A real SQLite file plus a log of the write statements run against it"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'sync.db'}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+    asyncio.run(database.init_db(engine))
+    writes = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record_writes(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT INTO JAVA_OUTLETS", "UPDATE JAVA_OUTLETS")):
+            writes.append(statement)
+
+    yield TestClient(app), writes
+    asyncio.run(engine.dispose())
+
+
+def test_sync_inserts_updates_and_skips_unchanged(sync_db):
+    """Only new and changed outlets are written"""
+    client, writes = sync_db
+    first = client.put("/outlets/sync", json=[outlet("Karen"), outlet("Westlands"), outlet("Nyali", "Mombasa")])
+    assert first.json() == {"inserted": 3, "updated": 0, "unchanged": 0, "closed": 0}
+
+    writes.clear()
+    second = client.put(
+        "/outlets/sync",
+        json=[outlet("Karen", rating=4.5), outlet("Westlands"), outlet("Nyali", "Mombasa"), outlet("Kisumu", "Kisumu")],
+    )
+
+    assert second.json() == {"inserted": 1, "updated": 1, "unchanged": 2, "closed": 0}
+    assert len(writes) == 2
+    outlets = {row["name"]: row for row in client.get("/outlets/").json()["outlets"]}
+    assert outlets["Karen"]["rating"] == 4.5
+    assert len(outlets) == 4
+
+
+def test_sync_can_close_missing_outlets(sync_db):
+    """Outlets HQ no longer lists are closed, not deleted"""
+    client, _ = sync_db
+    client.put("/outlets/sync", json=[outlet("Karen"), outlet("Westlands")])
+
+    response = client.put("/outlets/sync", params={"close_missing": "true"}, json=[outlet("Karen")])
+
+    assert response.json() == {"inserted": 0, "updated": 0, "unchanged": 1, "closed": 1}
+    outlets = {row["name"]: row for row in client.get("/outlets/").json()["outlets"]}
+    assert outlets["Westlands"]["is_open"] is False
+
+
+def test_sync_rejects_duplicate_natural_keys(sync_db):
+    client, writes = sync_db
+
+    response = client.put("/outlets/sync", json=[outlet("Karen"), outlet("Karen")])
+
+    assert response.status_code == 422
+    assert writes == []
@@ -0,0 +1,90 @@
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app import config
+from app.app import app
+from app.profiling import RequestProfiler, wants_profile
+
+ADMIN_KEY = "admin-secret"
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_API_KEYS", frozenset({ADMIN_KEY}))
+
+
+@pytest.fixture
+def profiled_app(tmp_path, monkeypatch, admin):
+    """A small app with the profiling middleware writing into tmp_path"""
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "PROFILE_MAX_DUMPS", 2)
+    profiler = RequestProfiler()
+    test_app = FastAPI()
+
+    @test_app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        if not wants_profile(request):
+            return await call_next(request)
+        return await profiler(request, call_next)
+
+    @test_app.get("/work")
+    async def work():
+        return {"total": sum(i * i for i in range(10000))}
+
+    return TestClient(test_app), profiler, tmp_path
+
+
+def _request(scope_headers):
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": scope_headers})
+
+
+def test_profile_header_requires_admin_key(admin):
+    """X-Profile is ignored unless the caller holds an admin key"""
+    assert not wants_profile(_request([(b"x-profile", b"1")]))
+    assert not wants_profile(_request([(b"x-profile", b"1"), (b"x-api-key", b"wrong")]))
+    assert wants_profile(_request([(b"x-profile", b"1"), (b"x-api-key", ADMIN_KEY.encode())]))
+
+
+def test_profiled_request_writes_bounded_dumps(profiled_app):
+    """Each profiled request leaves a .prof file; only the newest are kept"""
+    client, profiler, directory = profiled_app
+    headers = {"X-Profile": "1", "X-API-Key": ADMIN_KEY}
+
+    for _ in range(3):
+        response = client.get("/work", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["X-Profile-Dump"].endswith(".prof")
+
+    assert len(list(directory.glob("*.prof"))) == 2
+    summary = profiler.recent[0]
+    assert summary["route"] == "GET /work"
+    assert set(summary["categories"]) == {"validation", "sql", "serialization", "other"}
+    assert summary["hotspots"]
+
+
+def test_unprofiled_request_has_no_dump(profiled_app):
+    client, profiler, directory = profiled_app
+
+    response = client.get("/work")
+
+    assert "X-Profile-Dump" not in response.headers
+    assert not list(directory.glob("*.prof"))
+    assert not profiler.recent
+
+
+def test_admin_profiles_endpoint_requires_admin_key(admin):
+    client = TestClient(app)
+
+    assert client.get("/admin/profiles").status_code == 403
+    response = client.get("/admin/profiles", headers={"X-API-Key": ADMIN_KEY})
+    assert response.status_code == 200
+    assert "profiles" in response.json()
+
+
+def test_profiling_middleware_not_installed_by_default():
+    """With no admin keys or sample rate there is no per-request overhead"""
+    assert not config.PROFILING_ENABLED
+    names = [getattr(m.kwargs.get("dispatch"), "__name__", None) for m in app.user_middleware]
+    assert "profile_request" not in names
@@ -0,0 +1,69 @@
+"""Statement counts and query plans of the hot endpoints on a real SQLite file.
+
+A new N+1 loop or a lost index fails these tests instead of reaching
+production. Raise a budget only together with the change that needs it.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.app import app
+
+
+@pytest.fixture
+def client(query_budget):
+    client = TestClient(app)
+    client.post("/outlets/", json={
+        "name": "Java Junction", "location": "CBD", "city": "Nairobi", "county": "Nairobi", "is_open": True,
+    })
+    for name in ("Latte", "Croissant"):
+        client.post("/menu-items/", json={
+            "outlet_id": 1, "menu_item_name": name, "price": "350.10", "currency": "KES",
+            "is_available": True, "has_dairy": True, "is_seasonal": False,
+        })
+    client.post("/orders/", json={"outlet_id": 1, "product_ids": [1, 2]})
+    return client
+
+
+@pytest.mark.parametrize(
+    "path, max_queries, allow_scans",
+    [
+        ("/outlets/1/", 1, ()),
+        ("/outlets/?ids=1,2", 1, ()),
+        ("/outlets/", 1, ("java_outlets",)),
+        ("/outlets/1/menu/", 2, ()),
+        ("/outlets/1/queue", 1, ()),
+        ("/outlets/1/orders", 2, ()),
+        ("/outlets/changes?since=0", 3, ()),
+        ("/analytics/revenue?outlet_id=1", 1, ()),
+        ("/outlets/1/dashboard", 5, ()),
+        # Ranking reads every product and the period's orders by design
+        ("/analytics/top-items", 3, ("menu_items", "orders")),
+    ],
+)
+def test_read_budgets(client, query_budget, path, max_queries, allow_scans):
+    with query_budget.expect(max_queries=max_queries, allow_scans=allow_scans):
+        assert client.get(path).status_code == 200
+
+
+def test_place_order_budget(client, query_budget):
+    with query_budget.expect(max_queries=4):
+        assert client.post("/orders/", json={"outlet_id": 1, "product_ids": [1, 1, 2]}).status_code == 201
+
+
+def test_status_update_budget(client, query_budget):
+    with query_budget.expect(max_queries=2):
+        response = client.patch("/orders/1/status", json={"expected_status": "pending", "status": "preparing"})
+        assert response.status_code == 200
+
+
+def test_budget_catches_full_scans(query_budget):
+    """The fixture itself fails a block that scans a table it was not allowed to"""
+    with pytest.raises(AssertionError, match="full scan of java_outlets"):
+        with query_budget.expect(max_queries=1):
+            TestClient(app).get("/outlets/")
+
+
+def test_budget_catches_extra_statements(query_budget):
+    with pytest.raises(AssertionError, match="budget is 0"):
+        with query_budget.expect(max_queries=0):
+            TestClient(app).get("/outlets/1/")
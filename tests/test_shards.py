@@ -0,0 +1,152 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.app import app
+from app.database import ORDER_ID_BLOCK
+
+
+def outlet(name, county):
+    return {"name": name, "location": "CBD", "city": county, "county": county, "is_open": True}
+
+
+def menu_item(outlet_id, name="Latte"):
+    return {
+        "outlet_id": outlet_id, "menu_item_name": name, "price": "350.10", "currency": "KES",
+        "is_available": True, "has_dairy": True, "is_seasonal": False,
+    }
+
+
+@pytest.fixture
+def sharded(tmp_path, monkeypatch):
+    """Main file plus Nairobi and Mombasa order shards; Kisumu stays in the main file"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'main.db'}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+    files = {"Nairobi": tmp_path / "nairobi.db", "Mombasa": tmp_path / "mombasa.db"}
+    database.configure_shards({county: str(path) for county, path in files.items()})
+
+    async def setup():
+        await database.init_db(engine)
+        await database.init_shards()
+
+    asyncio.run(setup())
+    client = TestClient(app)
+    for name, county in (("Java Junction", "Nairobi"), ("Java Nyali", "Mombasa"), ("Java Kisumu", "Kisumu")):
+        client.post("/outlets/", json=outlet(name, county))
+    for outlet_id in (1, 2, 3):
+        client.post("/menu-items/", json=menu_item(outlet_id))
+    yield client, {**files, "main": tmp_path / "main.db"}
+
+    async def teardown():
+        for shard_engine in database.shard_engines:
+            await shard_engine.dispose()
+        await engine.dispose()
+
+    asyncio.run(teardown())
+    database.configure_shards({})
+
+
+def order_count(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT count(*) FROM orders").fetchone()[0]
+
+
+def test_orders_are_written_to_their_county_shard(sharded):
+    client, files = sharded
+
+    ids = [
+        client.post("/orders/", json={"outlet_id": outlet_id, "product_ids": [outlet_id]}).json()["id"]
+        for outlet_id in (1, 2, 3)
+    ]
+
+    assert ids[0] > ORDER_ID_BLOCK and ids[0] // ORDER_ID_BLOCK == 1
+    assert ids[1] > 2 * ORDER_ID_BLOCK
+    assert ids[2] < ORDER_ID_BLOCK
+    assert [order_count(files[name]) for name in ("Nairobi", "Mombasa", "main")] == [1, 1, 1]
+
+
+def test_order_reads_and_status_changes_follow_the_shard(sharded):
+    client, _ = sharded
+    order = client.post("/orders/", json={"outlet_id": 2, "product_ids": [2, 2]}).json()
+
+    assert [o["id"] for o in client.get("/outlets/2/queue").json()["orders"]] == [order["id"]]
+    assert [o["id"] for o in client.get("/outlets/2/orders").json()["orders"]] == [order["id"]]
+    response = client.patch(
+        f"/orders/{order['id']}/status", json={"expected_status": "pending", "status": "preparing"}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "preparing"
+
+
+def test_summaries_fan_out_and_merge(sharded):
+    """Revenue and top items cover every shard"""
+    client, _ = sharded
+    for outlet_id in (1, 2, 3):
+        client.post("/orders/", json={"outlet_id": outlet_id, "product_ids": [outlet_id]})
+
+    buckets = client.get("/analytics/revenue").json()["buckets"]
+    assert [bucket["outlet_id"] for bucket in buckets] == [1, 2, 3]
+    assert all(bucket["revenue"] == "350.10" for bucket in buckets)
+
+    counties = client.get("/analytics/top-items").json()["counties"]
+    assert {county["county"]: county["items"][0]["units"] for county in counties} == {
+        "Kisumu": 1, "Mombasa": 1, "Nairobi": 1,
+    }
+
+
+def test_a_locked_shard_does_not_block_other_counties(sharded):
+    """Each shard has its own writer: Mombasa orders go through while Nairobi is locked"""
+    client, files = sharded
+    blocker = sqlite3.connect(files["Nairobi"], isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        response = client.post("/orders/", json={"outlet_id": 2, "product_ids": [2]})
+        elapsed = time.perf_counter() - started
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+
+    assert response.status_code == 201
+    assert elapsed < 1
+
+
+def test_order_ids_are_not_reused_after_archiving(sharded):
+    client, files = sharded
+    first = client.post("/orders/", json={"outlet_id": 1, "product_ids": [1]}).json()["id"]
+    with sqlite3.connect(files["Nairobi"]) as conn:
+        conn.execute("INSERT INTO orders_archive SELECT * FROM orders")
+        conn.execute("DELETE FROM orders")
+
+    second = client.post("/orders/", json={"outlet_id": 1, "product_ids": [1]}).json()["id"]
+
+    assert second == first + 1
+
+
+def test_unknown_shard_key_is_rejected(monkeypatch):
+    monkeypatch.setattr(database.config, "ORDER_SHARD_KEY", "no_such_column")
+
+    with pytest.raises(ValueError):
+        database.configure_shards({})
+
+
+def test_stock_is_returned_when_the_shard_write_fails(sharded, monkeypatch):
+    """Stock lives in the main file; a failed order on a shard gives the units back"""
+    client, files = sharded
+    client.post("/menu-items/1/restock", json={"quantity": 2})
+    assert client.post("/orders/", json={"outlet_id": 1, "product_ids": [1]}).status_code == 201
+
+    def failing_next_order_id(shard):
+        raise RuntimeError("disk I/O error")
+
+    monkeypatch.setattr("app.app.next_order_id", failing_next_order_id)
+    response = client.post("/orders/", json={"outlet_id": 1, "product_ids": [1]})
+
+    assert response.status_code == 500
+    with sqlite3.connect(files["main"]) as conn:
+        assert conn.execute("SELECT stock, is_available FROM menu_items WHERE id = 1").fetchone() == (1, 1)
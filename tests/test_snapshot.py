@@ -0,0 +1,121 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.app import app
+from app.snapshot import CatalogSnapshots
+
+
+def outlet(name):
+    return {"name": name, "location": "CBD", "city": "Nairobi", "county": "Nairobi", "is_open": True}
+
+
+@pytest.fixture
+def snapshot_db(tmp_path, monkeypatch):
+    """A real SQLite file and a snapshot directory under tmp_path"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'catalog.db'}")
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+    asyncio.run(database.init_db(engine))
+    snapshots = CatalogSnapshots(directory=str(tmp_path / "snapshots"), debounce_seconds=0.01, keep=2)
+    monkeypatch.setattr("app.app.catalog_snapshots", snapshots)
+    client = TestClient(app)
+    client.post("/outlets/", json=outlet("Java Junction"))
+    client.post("/menu-items/", json={
+        "outlet_id": 1, "menu_item_name": "Latte", "price": "350.10", "currency": "KES",
+        "is_available": True, "has_dairy": True, "is_seasonal": False,
+    })
+    yield client, snapshots
+    asyncio.run(engine.dispose())
+
+
+def test_snapshot_contains_catalog(snapshot_db):
+    client, _ = snapshot_db
+
+    response = client.get("/catalog/snapshot", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [entry["outlet"]["name"] for entry in body["outlets"]] == ["Java Junction"]
+    assert body["outlets"][0]["menu_items"][0]["price"] == "350.10"
+    assert response.headers["etag"] == f'"catalog-{body["version"]}"'
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_gzip_variant_is_the_same_catalog(snapshot_db):
+    client, snapshots = snapshot_db
+    plain = client.get("/catalog/snapshot", headers={"Accept-Encoding": "identity"})
+
+    response = client.get("/catalog/snapshot", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-gzip"')
+    # httpx decodes the body, so compare against the file on disk too
+    files = snapshots.files(plain.json()["version"])
+    assert gzip.decompress(files.gzip_path.read_bytes()) == plain.content
+
+
+def test_etag_revalidation_and_catalog_writes(snapshot_db):
+    """If-None-Match gets 304 until a catalog write moves the version"""
+    client, _ = snapshot_db
+    headers = {"Accept-Encoding": "identity"}
+    etag = client.get("/catalog/snapshot", headers=headers).headers["etag"]
+
+    assert client.get("/catalog/snapshot", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    client.post("/outlets/", json=outlet("Java Karen"))
+    response = client.get("/catalog/snapshot", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()["outlets"]) == 2
+
+
+def test_range_requests_resume_downloads(snapshot_db):
+    client, _ = snapshot_db
+    headers = {"Accept-Encoding": "identity"}
+    full = client.get("/catalog/snapshot", headers=headers)
+
+    response = client.get("/catalog/snapshot", headers={**headers, "Range": "bytes=10-"})
+
+    assert response.status_code == 206
+    assert response.content == full.content[10:]
+
+
+def test_only_recent_versions_are_kept(snapshot_db):
+    client, snapshots = snapshot_db
+    for name in ("Java Karen", "Java Westlands", "Java Kilimani"):
+        client.post("/outlets/", json=outlet(name))
+        client.get("/catalog/snapshot")
+
+    assert len(list(snapshots.directory.glob("catalog-*.json"))) == 2
+    assert len(list(snapshots.directory.glob("catalog-*.json.gz"))) == 2
+
+
+def test_writes_schedule_one_debounced_rebuild(snapshot_db):
+    """A burst of catalog writes leads to a single build once they stop"""
+    _, snapshots = snapshot_db
+    builds = []
+
+    async def scenario():
+        original = snapshots.build
+
+        async def counting_build():
+            builds.append(1)
+            return await original()
+
+        snapshots.build = counting_build
+        snapshots.start()
+        for _ in range(5):
+            snapshots.schedule()
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.2)
+        await snapshots.stop()
+
+    asyncio.run(scenario())
+
+    assert builds == [1]
+    assert list(snapshots.directory.glob("catalog-*.json.gz"))
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import database
+from app.app import app
+
+COLD_START_BUDGET_SECONDS = float(os.getenv("COLD_START_BUDGET_SECONDS", "3.0"))
+
+
+@pytest.fixture
+def temp_engine(tmp_path, monkeypatch):
+    """Point init_db at a throwaway SQLite file"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'startup.db'}")
+    monkeypatch.setattr(database, "engine", engine)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def test_init_db_skips_ddl_when_fingerprint_matches(temp_engine):
+    """Only the first start against a fresh file runs DDL"""
+    assert asyncio.run(database.init_db()) is True
+    assert asyncio.run(database.init_db()) is False
+
+
+def test_init_db_reapplies_schema_when_migrations_change(temp_engine, monkeypatch):
+    """Registering a migration changes the fingerprint and re-runs DDL"""
+    applied = []
+
+    def add_test_marker(conn):
+        applied.append(True)
+
+    asyncio.run(database.init_db())
+    monkeypatch.setattr(database, "MIGRATIONS", [add_test_marker])
+
+    assert asyncio.run(database.init_db()) is True
+    assert applied == [True]
+
+
+def test_startup_report_endpoint():
+    """The startup report exposes import timing for the worker"""
+    client = TestClient(app)
+    response = client.get("/health/startup")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["import_seconds"] > 0
+    assert "db_init_seconds" in data
+    assert "first_request_seconds" in data
+
+
+def test_cold_import_within_budget():
+    """Importing the app in a fresh interpreter stays under the cold start budget"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.app"], check=True)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < COLD_START_BUDGET_SECONDS, (
+        f"cold import took {elapsed:.2f}s, budget is {COLD_START_BUDGET_SECONDS:.2f}s"
+    )
+
+
+def test_concurrent_init_db_applies_schema_once(tmp_path):
+    """Workers starting together serialize on the write lock; one applies DDL"""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'race.db'}"
+
+    async def start_worker():
+        engine = create_async_engine(url, connect_args={"timeout": 10})
+        try:
+            return await database.init_db(engine)
+        finally:
+            await engine.dispose()
+
+    async def scenario():
+        return await asyncio.gather(*(start_worker() for _ in range(4)))
+
+    assert sorted(asyncio.run(scenario())) == [False, False, False, True]
+
+
+def test_float_prices_migrate_to_minor_units(temp_engine):
+    """Databases from before integer cents keep their prices, exactly"""
+    async def scenario():
+        async with temp_engine.begin() as conn:
+            await conn.exec_driver_sql(
+                "CREATE TABLE menu_items (id INTEGER PRIMARY KEY, outlet_id INTEGER NOT NULL, "
+                "menu_item_name TEXT NOT NULL, category TEXT, sku TEXT, price FLOAT NOT NULL, "
+                "currency TEXT NOT NULL, is_available INTEGER NOT NULL, has_dairy INTEGER NOT NULL, "
+                "is_seasonal INTEGER NOT NULL)"
+            )
+            await conn.exec_driver_sql(
+                "INSERT INTO menu_items VALUES (1, 1, 'Latte', NULL, NULL, 350.1, 'KES', 1, 0, 0)"
+            )
+        await database.init_db()
+        async with temp_engine.connect() as conn:
+            return (await conn.exec_driver_sql("SELECT * FROM menu_items")).mappings().one()
+
+    row = asyncio.run(scenario())
+
+    assert row["price_cents"] == 35010
+    assert "price" not in row
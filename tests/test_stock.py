@@ -0,0 +1,114 @@
+import asyncio
+import sqlite3
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import database
+from app.app import app
+
+
+def menu_item(name, stock=None):
+    return {
+        "outlet_id": 1, "menu_item_name": name, "price": "250.00", "currency": "KES",
+        "is_available": True, "has_dairy": False, "is_seasonal": False, "stock": stock,
+    }
+
+
+@pytest.fixture
+def stock_db(tmp_path, monkeypatch):
+    """A real SQLite file with one outlet, 3 croissants in stock and uncounted coffee"""
+    path = tmp_path / "stock.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 10})
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(engine, class_=AsyncSession))
+    asyncio.run(database.init_db(engine))
+    client = TestClient(app)
+    client.post("/outlets/", json={
+        "name": "Java Junction", "location": "CBD", "city": "Nairobi", "county": "Nairobi", "is_open": True,
+    })
+    client.post("/menu-items/", json=menu_item("Croissant", stock=3))
+    client.post("/menu-items/", json=menu_item("Filter Coffee"))
+    yield client, path
+    asyncio.run(engine.dispose())
+
+
+def item(path, item_id):
+    with sqlite3.connect(path) as conn:
+        conn.row_factory = sqlite3.Row
+        return conn.execute("SELECT stock, is_available FROM menu_items WHERE id = ?", (item_id,)).fetchone()
+
+
+def order_count(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT count(*) FROM orders").fetchone()[0]
+
+
+def test_orders_take_stock_and_sell_out(stock_db):
+    """The last unit flips the item to unavailable"""
+    client, path = stock_db
+
+    assert client.post("/orders/", json={"outlet_id": 1, "product_ids": [1, 1, 2]}).status_code == 201
+    assert tuple(item(path, 1)) == (1, 1)
+    assert client.post("/orders/", json={"outlet_id": 1, "product_ids": [1]}).status_code == 201
+    assert tuple(item(path, 1)) == (0, 0)
+
+    response = client.post("/orders/", json={"outlet_id": 1, "product_ids": [1]})
+    assert response.status_code == 422
+    assert item(path, 2)["stock"] is None
+
+
+def test_short_stock_rejects_the_whole_order(stock_db):
+    """Asking for more than is left changes nothing"""
+    client, path = stock_db
+
+    response = client.post("/orders/", json={"outlet_id": 1, "product_ids": [1, 1, 1, 1, 2]})
+
+    assert response.status_code == 409
+    assert tuple(item(path, 1)) == (3, 1)
+    assert order_count(path) == 0
+
+
+def test_concurrent_orders_never_oversell(stock_db):
+    """A burst of orders for the last units: exactly as many succeed as there were units"""
+    _, path = stock_db
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(client.post("/orders/", json={"outlet_id": 1, "product_ids": [1]}) for _ in range(12))
+            )
+
+    statuses = [response.status_code for response in asyncio.run(burst())]
+
+    assert statuses.count(201) == 3
+    assert set(statuses) <= {201, 409, 422}
+    assert tuple(item(path, 1)) == (0, 0)
+    assert order_count(path) == 3
+
+
+def test_restock_makes_item_available_again(stock_db):
+    client, path = stock_db
+    client.post("/orders/", json={"outlet_id": 1, "product_ids": [1, 1, 1]})
+
+    response = client.post("/menu-items/1/restock", json={"quantity": 5})
+
+    assert response.status_code == 200
+    assert response.json()["stock"] == 5
+    assert response.json()["is_available"] is True
+    assert client.post("/menu-items/99/restock", json={"quantity": 5}).status_code == 404
+
+
+def test_stock_changes_are_not_catalog_changes(stock_db):
+    """Delta sync is not flooded by every sale, but sees the sell-out"""
+    client, _ = stock_db
+    since = client.get("/outlets/changes").json()["next_since"]
+
+    client.post("/orders/", json={"outlet_id": 1, "product_ids": [1]})
+    assert client.get("/outlets/changes", params={"since": since}).json()["menu_items"] == []
+
+    client.post("/orders/", json={"outlet_id": 1, "product_ids": [1, 1]})
+    changed = client.get("/outlets/changes", params={"since": since}).json()["menu_items"]
+    assert [(entry["id"], entry["is_available"]) for entry in changed] == [(1, False)]